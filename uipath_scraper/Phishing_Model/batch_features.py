@@ -0,0 +1,103 @@
+"""
+Phishing Email Detection - Batch Feature Columns
+Character-class counts for many strings at once via lookup tables over one encoded buffer,
+and the column-oriented feature container analyze_batch works with
+"""
+from typing import Dict, List
+
+import numpy as np
+
+
+# Character classes, one bit each (the same str predicates the per-email extractor uses)
+UPPER, DIGIT, SPECIAL, EXCLAMATION, QUESTION, MONEY, DOT = (1 << bit for bit in range(7))
+CLASS_BITS = {'upper': UPPER, 'digit': DIGIT, 'special': SPECIAL, 'exclamation': EXCLAMATION,
+              'question': QUESTION, 'money': MONEY, 'dot': DOT}
+MONEY_SYMBOLS = ('$', '€', '₹', '£', '¥')
+
+
+def char_class(char: str) -> int:
+    """Class bits of one character"""
+    bits = 0
+    if char.isupper():
+        bits |= UPPER
+    if char.isdigit():
+        bits |= DIGIT
+    if not char.isalnum() and not char.isspace():
+        bits |= SPECIAL
+    if char == '!':
+        bits |= EXCLAMATION
+    if char == '?':
+        bits |= QUESTION
+    if char in MONEY_SYMBOLS:
+        bits |= MONEY
+    if char == '.':
+        bits |= DOT
+    return bits
+
+
+# Code points 0-255 (ASCII and Latin-1) are looked up; the rare others are classified
+# once per distinct code point
+CLASS_TABLE = np.array([char_class(chr(code)) for code in range(256)], dtype=np.uint8)
+
+
+def count_char_classes(texts: List[str], classes=tuple(CLASS_BITS)) -> Dict[str, np.ndarray]:
+    """Per-text counts of each character class, from one UTF-32 buffer of all texts"""
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    counts = {name: np.zeros(len(texts), dtype=np.int64) for name in classes}
+    if not lengths.sum():
+        return counts
+
+    # UTF-32 has one code unit per code point, so offsets are str lengths
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+    flags = np.empty(len(codes), dtype=np.uint8)
+    latin = codes < 256
+    flags[latin] = CLASS_TABLE[codes[latin]]
+    if not latin.all():
+        distinct, inverse = np.unique(codes[~latin], return_inverse=True)
+        flags[~latin] = np.array([char_class(chr(code)) for code in distinct], dtype=np.uint8)[inverse]
+
+    # reduceat over non-empty texts only (an empty segment would report its neighbour)
+    nonempty = np.flatnonzero(lengths)
+    starts = (np.cumsum(lengths) - lengths)[nonempty]
+    for name in classes:
+        counts[name][nonempty] = np.add.reduceat((flags & CLASS_BITS[name]) != 0, starts, dtype=np.int64)
+    return counts
+
+
+class FeatureBatch:
+    """URL, text and sender features of many emails as columns; rows are built on demand"""
+
+    URL_FEATURES = ('num_urls', 'num_unique_domains', 'has_ip', 'avg_url_length',
+                    'has_phishing_keywords_in_url', 'num_dots_in_url', 'num_digits_in_url')
+    TEXT_FEATURES = ('subject_len', 'body_len', 'num_uppercase', 'num_digits', 'num_special_chars',
+                     'has_money_symbol', 'num_exclamation', 'num_question', 'has_phishing_keywords',
+                     'ratio_uppercase', 'ratio_digits')
+    SENDER_FEATURES = ('sender_domain_mismatch', 'sender_has_numbers', 'sender_length')
+    # Averages of emails without URLs are reported as int 0, as the per-email extractor does
+    URL_AVERAGES = ('avg_url_length', 'num_dots_in_url', 'num_digits_in_url')
+
+    def __init__(self, urls: List, columns: Dict[str, np.ndarray], malicious_extensions: List[List[str]]):
+        self.urls = urls
+        self.columns = columns
+        self.malicious_extensions = malicious_extensions
+        self.values = None
+
+    def __len__(self):
+        return len(self.urls)
+
+    def row(self, index: int) -> Dict:
+        """One email's features in the per-email layout (as PhishingDetector.extract_features)"""
+        if self.values is None:
+            # Python ints/floats for the whole batch in one conversion per column
+            self.values = {name: column.tolist() for name, column in self.columns.items()}
+        values = {name: column[index] for name, column in self.values.items()}
+        if not values['num_urls']:
+            values.update((name, 0) for name in self.URL_AVERAGES)
+
+        return {
+            'urls': self.urls[index],
+            'url_features': {name: values[name] for name in self.URL_FEATURES},
+            'text_features': {name: values[name] for name in self.TEXT_FEATURES},
+            'sender_features': {name: values[name] for name in self.SENDER_FEATURES},
+            'malicious_extensions': self.malicious_extensions[index]
+        }
@@ -0,0 +1,135 @@
+"""
+Phishing Email Detection - Campaign Index
+MinHash/LSH near-duplicate index over tokenized emails, grouping campaign copies into clusters
+"""
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+ID_BITS = 21  # token ids are packed into one uint64 per shingle (vocabularies up to 2M words)
+
+
+class Campaign:
+    """One cluster of near-duplicate emails and the prediction of its first scored member"""
+    __slots__ = ('cluster_id', 'signature', 'band_keys', 'prediction', 'size')
+
+    def __init__(self, cluster_id: str, signature: np.ndarray, band_keys: List[bytes]):
+        self.cluster_id = cluster_id
+        self.signature = signature
+        self.band_keys = band_keys
+        # (is_phishing, confidence), with a trailing 'cascade' when the linear scorer settled it
+        self.prediction = None
+        self.size = 0
+
+
+class CampaignIndex:
+    """LSH over MinHash signatures of token-id shingles; keeps the most recently seen clusters"""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 max_clusters: int = 10000, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_clusters = max_clusters
+
+        # Fixed seed: the same email gets the same signature (and cluster id) in every run
+        rng = np.random.RandomState(seed)
+        self.perm_a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+        self.clusters = OrderedDict()  # cluster id -> Campaign, least recently matched first
+        self.band_tables = [{} for _ in range(bands)]  # band key -> cluster id
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def shingles(self, tokens: np.ndarray) -> np.ndarray:
+        """32-bit hashes of the token-id k-grams (the whole sequence when it is shorter than k)"""
+        tokens = tokens.astype(np.uint64)
+        k = min(self.shingle_size, len(tokens))
+        packed = np.zeros(len(tokens) - k + 1, dtype=np.uint64)
+        for offset in range(k):
+            packed = (packed << np.uint64(ID_BITS)) | tokens[offset:len(tokens) - k + 1 + offset]
+        # Multiplicative hash into 32 bits (uint64 arithmetic wraps)
+        return (packed * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+
+    def signatures(self, matrix: np.ndarray, lengths: np.ndarray,
+                   chunk_size: int = 64) -> List[Optional[np.ndarray]]:
+        """MinHash signature per texts_to_matrix row; None for rows without tokens"""
+        hashes = [self.shingles(row[:length]) if length else None for row, length in zip(matrix, lengths)]
+        present = [h for h in hashes if h is not None]
+
+        # The shingles of chunk_size rows at a time in one (shingles, num_perm) pass, reduced per row
+        minimums = []
+        for start in range(0, len(present), chunk_size):
+            chunk = present[start:start + chunk_size]
+            flat = np.concatenate(chunk)
+            permuted = ((flat[:, None] * self.perm_a + self.perm_b) % MERSENNE_PRIME) & MAX_HASH
+            starts = np.cumsum([0] + [len(h) for h in chunk[:-1]])
+            minimums.extend(np.minimum.reduceat(permuted, starts, axis=0).astype(np.uint32))
+
+        rows = iter(minimums)
+        return [next(rows) if h is not None else None for h in hashes]
+
+    def band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """One hashable key per LSH band"""
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def match(self, signature: np.ndarray, keys: List[bytes]) -> Tuple[Optional[Campaign], float]:
+        """Most similar indexed cluster sharing a band, if its estimated Jaccard reaches the threshold"""
+        best, best_similarity = None, 0.0
+        for table, key in zip(self.band_tables, keys):
+            cluster_id = table.get(key)
+            if cluster_id is None or (best is not None and cluster_id == best.cluster_id):
+                continue
+            campaign = self.clusters[cluster_id]
+            similarity = float(np.mean(campaign.signature == signature))
+            if similarity > best_similarity:
+                best, best_similarity = campaign, similarity
+        if best is None or best_similarity < self.threshold:
+            return None, 0.0
+        return best, best_similarity
+
+    def add(self, signature: np.ndarray, keys: List[bytes]) -> Campaign:
+        """Start a cluster represented by this signature, evicting the least recent one when full"""
+        cluster_id = 'cmp-' + hashlib.sha1(signature.tobytes()).hexdigest()[:12]
+        campaign = self.clusters.get(cluster_id)
+        if campaign is not None:
+            return campaign
+
+        campaign = self.clusters[cluster_id] = Campaign(cluster_id, signature, keys)
+        for table, key in zip(self.band_tables, keys):
+            table[key] = cluster_id
+        if len(self.clusters) > self.max_clusters:
+            _, evicted = self.clusters.popitem(last=False)
+            for table, key in zip(self.band_tables, evicted.band_keys):
+                if table.get(key) == evicted.cluster_id:
+                    del table[key]
+        return campaign
+
+    def assign(self, matrix: np.ndarray, lengths: np.ndarray) -> List[Optional[Tuple[Campaign, float]]]:
+        """Cluster each row (earlier rows of the batch included) as (campaign, similarity); None if empty"""
+        assignments = []
+        for signature in self.signatures(matrix, lengths):
+            if signature is None:
+                assignments.append(None)
+                continue
+            keys = self.band_keys(signature)
+            campaign, similarity = self.match(signature, keys)
+            if campaign is None:
+                campaign, similarity = self.add(signature, keys), 1.0
+            self.clusters.move_to_end(campaign.cluster_id)
+            campaign.size += 1
+            assignments.append((campaign, similarity))
+        return assignments
@@ -0,0 +1,195 @@
+"""
+Phishing Email Detection - Cascade Scorer
+Sparse linear model over the shipped TF-IDF vectorizer and the handcrafted email features.
+It settles the clearly safe / clearly phishing emails; only its uncertain band goes to the LSTM.
+"""
+import json
+import sys
+import types
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+CASCADE_MODEL_FILE = 'cascade_scorer.npz'
+TFIDF_FILE = 'tfidf_vectorizer.pkl'
+FEATURE_TRANSFORMER_FILE = 'feature_transformer.pkl'
+# TF-IDF reads the leading words only, so a 2 MB newsletter costs as much as a short email
+MAX_WORDS = 1000
+
+
+def load_feature_scaler(path: Path):
+    """StandardScaler from feature_transformer.pkl (pickled by the training code's src package)"""
+    import joblib
+
+    # The pickle references src.feature_engineering.EmailFeatureExtractor, which only holds
+    # regexes and keyword lists; unpickle it into a placeholder and keep the scaler
+    placeholder = types.ModuleType('src.feature_engineering')
+    placeholder.EmailFeatureExtractor = type('EmailFeatureExtractor', (), {})
+    saved = {name: sys.modules.get(name) for name in ('src', 'src.feature_engineering')}
+    sys.modules['src'] = types.ModuleType('src')
+    sys.modules['src.feature_engineering'] = placeholder
+    try:
+        with open(path, 'rb') as f:
+            transformer = joblib.load(f)
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    return transformer['scaler']
+
+
+def feature_columns(features, emails: List[Dict]) -> Dict[str, np.ndarray]:
+    """FeatureBatch columns plus num_attachments, keyed like the scaler's columns"""
+    return {
+        **features.columns,
+        'num_attachments': np.array([email.get('num_attachments', 0) for email in emails], dtype=np.float64)
+    }
+
+
+class CascadeScorer:
+    """Logistic scorer: sigmoid(tfidf(text) . w_text + scaled(features) . w_features + b)"""
+
+    def __init__(self, vectorizer, scaler, coef: np.ndarray, intercept: float,
+                 band: Tuple[float, float] = (0.1, 0.9)):
+        low, high = band
+        if not 0.0 <= low <= 0.5 <= high <= 1.0:
+            raise ValueError(f"cascade band must satisfy 0 <= low <= 0.5 <= high <= 1, got {band}")
+        self.vectorizer = vectorizer
+        self.feature_names = list(scaler.feature_names_in_)
+        self.mean = scaler.mean_
+        self.scale = scaler.scale_
+        self.band = (low, high)
+
+        vocab_size = len(vectorizer.vocabulary_)
+        if coef.shape != (vocab_size + len(self.feature_names),):
+            raise ValueError(f"cascade weights have shape {coef.shape}, expected "
+                             f"({vocab_size + len(self.feature_names)},) for this vectorizer")
+        self.coef = coef
+        self.text_coef = coef[:vocab_size]
+        self.feature_coef = coef[vocab_size:]
+        self.intercept = float(intercept)
+
+    @classmethod
+    def load_inputs(cls, model_dir: Path) -> tuple:
+        """The shipped TF-IDF vectorizer and feature scaler"""
+        import joblib
+
+        model_dir = Path(model_dir)
+        with open(model_dir / TFIDF_FILE, 'rb') as f:
+            vectorizer = joblib.load(f)
+        return vectorizer, load_feature_scaler(model_dir / FEATURE_TRANSFORMER_FILE)
+
+    @classmethod
+    def load(cls, model_dir: Path, band: Tuple[float, float] = (0.1, 0.9)) -> 'CascadeScorer':
+        """Vectorizer, scaler and the weights fitted by `python cascade_scorer.py`"""
+        weights_path = Path(model_dir) / CASCADE_MODEL_FILE
+        if not weights_path.exists():
+            raise FileNotFoundError(f"{weights_path} not found. Run: python cascade_scorer.py --input emails.json")
+        vectorizer, scaler = cls.load_inputs(model_dir)
+        with np.load(weights_path) as weights:
+            return cls(vectorizer, scaler, weights['coef'], weights['intercept'], band)
+
+    @staticmethod
+    def leading_text(text: str) -> str:
+        """First MAX_WORDS whitespace-separated words of a text"""
+        return ' '.join(str(text).split(None, MAX_WORDS)[:MAX_WORDS])
+
+    def feature_matrix(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Standardized handcrafted features, one row per email"""
+        raw = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in self.feature_names])
+        return (raw - self.mean) / self.scale
+
+    def probabilities(self, texts: List[str], columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Phishing probability per email"""
+        tfidf = self.vectorizer.transform([self.leading_text(text) for text in texts])
+        logits = tfidf @ self.text_coef + self.feature_matrix(columns) @ self.feature_coef + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def decide(self, probabilities: np.ndarray) -> List[Optional[tuple]]:
+        """(is_phishing, confidence) outside the uncertain band, None inside it"""
+        low, high = self.band
+        return [(False, float(p)) if p <= low else (True, float(p)) if p >= high else None
+                for p in probabilities]
+
+    @classmethod
+    def fit(cls, vectorizer, scaler, texts: List[str], columns: Dict[str, np.ndarray],
+            targets: np.ndarray, c: float = 10.0) -> tuple:
+        """Logistic regression on targets in [0, 1] (labels, or LSTM scores to distil)"""
+        from scipy import sparse
+        from sklearn.linear_model import LogisticRegression
+
+        scorer = cls(vectorizer, scaler, np.zeros(len(vectorizer.vocabulary_) + len(scaler.feature_names_in_)), 0.0)
+        design = sparse.hstack([
+            vectorizer.transform([cls.leading_text(text) for text in texts]),
+            sparse.csr_matrix(scorer.feature_matrix(columns))
+        ]).tocsr()
+
+        # Soft targets: every email is a positive with weight p and a negative with weight 1 - p
+        targets = np.clip(np.asarray(targets, dtype=np.float64), 0.0, 1.0)
+        model = LogisticRegression(C=c, max_iter=2000)
+        model.fit(sparse.vstack([design, design]),
+                  np.concatenate([np.ones(len(targets)), np.zeros(len(targets))]),
+                  sample_weight=np.concatenate([targets, 1.0 - targets]))
+        return model.coef_[0].astype(np.float64), float(model.intercept_[0])
+
+    @staticmethod
+    def save(path: Path, coef: np.ndarray, intercept: float, metadata: Dict):
+        """Write the weights (and how they were fitted) to an .npz file"""
+        np.savez(path, coef=coef, intercept=np.float64(intercept), metadata=json.dumps(metadata))
+
+
+# ==================== MAIN FUNCTION ====================
+
+def main():
+    import argparse
+
+    from phishing_detector import PhishingDetector
+
+    parser = argparse.ArgumentParser(description='Fit the cascade scorer on tfidf_vectorizer.pkl features')
+    parser.add_argument('--input', required=True, help='Input JSON file with emails')
+    parser.add_argument('--model-dir', default='models', help='Directory with model files')
+    parser.add_argument('--backend', choices=PhishingDetector.BACKENDS, default='torch',
+                        help='Backend of the LSTM whose scores are distilled')
+    parser.add_argument('--c', type=float, default=10.0, help='Inverse L2 regularization strength')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("CASCADE SCORER TRAINING")
+    print("="*80)
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        emails = json.load(f)
+    print(f"Loaded {len(emails)} email(s)")
+
+    detector = PhishingDetector(model_dir=args.model_dir, backend=args.backend, result_cache_size=0)
+    # Emails with a 'label' field (1/true = phishing) train on it, the rest on the LSTM's score
+    labelled = sum(1 for email in emails if 'label' in email)
+    lstm_scores = [confidence for _, confidence in detector.predict_batch(emails)]
+    targets = np.array([float(bool(email['label'])) if 'label' in email else score
+                        for email, score in zip(emails, lstm_scores)])
+    print(f"Targets: {labelled} labels, {len(emails) - labelled} LSTM scores")
+
+    texts = [detector.prepare_text(email) for email in emails]
+    columns = feature_columns(detector.extract_features_batch(emails), emails)
+    vectorizer, scaler = CascadeScorer.load_inputs(args.model_dir)
+    coef, intercept = CascadeScorer.fit(vectorizer, scaler, texts, columns, targets, args.c)
+
+    output_path = Path(args.model_dir) / CASCADE_MODEL_FILE
+    CascadeScorer.save(output_path, coef, intercept, {
+        'emails': len(emails),
+        'labelled': labelled,
+        'c': args.c,
+        'lstm_backend': args.backend,
+        'created_at': datetime.now().isoformat()
+    })
+    print(f"Saved to: {output_path}")
+    print("="*80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# simple_test.py is a demo script that loads the model and analyzes an email when imported, not a pytest module
+collect_ignore = ['simple_test.py']
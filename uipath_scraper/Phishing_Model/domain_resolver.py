@@ -0,0 +1,149 @@
+"""
+Phishing Email Detection - Offline Domain Suffix Resolver
+Splits URL hosts into subdomain / domain / public suffix from a bundled Public Suffix List
+(ICANN section), with the same results as tldextract's default extract() and no network access
+"""
+import re
+from functools import lru_cache
+from ipaddress import AddressValueError, IPv6Address
+from pathlib import Path
+from typing import List, NamedTuple
+from urllib.parse import scheme_chars
+
+try:
+    import idna
+except ImportError:
+    idna = None
+
+
+SUFFIX_LIST_FILE = Path(__file__).parent / 'public_suffix_list.dat'
+RULE_PATTERN = re.compile(r'^(?P<suffix>[.*!]*\w[\S]*)', re.UNICODE | re.MULTILINE)
+IPV4_PATTERN = re.compile(r'^(?:(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}'
+                          r'(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$', re.ASCII)
+UNICODE_DOTS = ('。', '．', '｡')
+SCHEME_CHARS = set(scheme_chars)
+
+
+class DomainParts(NamedTuple):
+    """Host split the way tldextract.extract() splits it"""
+    subdomain: str
+    domain: str
+    suffix: str
+
+
+class _Node:
+    """Suffix trie node; children are keyed by label, walked from the TLD inwards"""
+    __slots__ = ('children', 'end')
+
+    def __init__(self):
+        self.children = {}
+        self.end = False
+
+
+def read_rules(path: Path) -> List[str]:
+    """Suffix rules of a public_suffix_list.dat file, ICANN section only"""
+    text = Path(path).read_text(encoding='utf-8')
+    public_text = text.partition('// ===BEGIN PRIVATE DOMAINS===')[0]
+    return [match.group('suffix') for match in RULE_PATTERN.finditer(public_text)]
+
+
+def host_of(url: str) -> str:
+    """Case-preserving host of a URL-like string (lenient, like tldextract)"""
+    double_slashes = url.find('//')
+    if double_slashes == 0:
+        url = url[2:]
+    elif (double_slashes >= 2 and url[double_slashes - 1] == ':'
+          and not set(url[:double_slashes - 1]) - SCHEME_CHARS):
+        url = url[double_slashes + 2:]
+
+    authority = url.partition('/')[0].partition('?')[0].partition('#')[0]
+    host = authority.rpartition('@')[2]
+    if host and host[0] == '[':
+        address, bracket, _ = host.partition(']')
+        if bracket:
+            return f"{address}]"
+    return host.partition(':')[0].strip().rstrip('.' + ''.join(UNICODE_DOTS))
+
+
+def decode_label(label: str) -> str:
+    """Lowercase a host label and decode punycode, as suffix rules are stored in Unicode"""
+    lowered = label.lower()
+    if lowered.startswith('xn--'):
+        try:
+            return idna.decode(lowered) if idna is not None else lowered.encode('ascii').decode('idna')
+        except (UnicodeError, IndexError):
+            pass
+    return lowered
+
+
+class PublicSuffixResolver:
+    """Public-suffix trie with an LRU-memoized host split"""
+
+    def __init__(self, path: Path = SUFFIX_LIST_FILE, cache_size: int = 65536):
+        self.root = _Node()
+        for rule in read_rules(path):
+            node = self.root
+            for label in reversed(rule.split('.')):
+                node = node.children.setdefault(label, _Node())
+            node.end = True
+
+        self.split_host = lru_cache(maxsize=cache_size)(self._split_host)
+
+    def extract(self, url: str) -> DomainParts:
+        """Subdomain, domain and suffix of a URL's host"""
+        return self.split_host(host_of(url))
+
+    def registered_domain(self, url: str) -> str:
+        """f"{domain}.{suffix}" - the key the URL and sender features compare"""
+        parts = self.extract(url)
+        return f"{parts.domain}.{parts.suffix}"
+
+    def suffix_index(self, labels: List[str]) -> int:
+        """Index of the first public-suffix label, or None when no rule matches"""
+        node = self.root
+        suffix_index = label_index = len(labels)
+        for label in reversed(labels):
+            decoded = decode_label(label)
+            if decoded in node.children:
+                label_index -= 1
+                node = node.children[decoded]
+                if node.end:
+                    suffix_index = label_index
+                continue
+
+            # '*.ck' covers any label under ck, except the ones with a '!www.ck' rule
+            if '*' in node.children:
+                return label_index if '!' + decoded in node.children else label_index - 1
+            break
+
+        return suffix_index if suffix_index < len(labels) else None
+
+    def _split_host(self, host: str) -> DomainParts:
+        for dot in UNICODE_DOTS:
+            host = host.replace(dot, '.')
+
+        if len(host) >= 4 and host[0] == '[' and host[-1] == ']':
+            try:
+                IPv6Address(host[1:-1])
+                return DomainParts('', host, '')
+            except AddressValueError:
+                pass
+
+        labels = host.split('.')
+        index = self.suffix_index(labels)
+        if index is None:
+            if len(labels) == 4 and host[:1].isdecimal() and IPV4_PATTERN.fullmatch(host):
+                return DomainParts('', host, '')
+            return DomainParts('.'.join(labels[:-1]), labels[-1], '')
+
+        return DomainParts(
+            subdomain='.'.join(labels[:index - 1]) if index >= 2 else '',
+            domain=labels[index - 1] if index > 0 else '',
+            suffix='.'.join(labels[index:])
+        )
+
+
+@lru_cache(maxsize=None)
+def default_resolver() -> PublicSuffixResolver:
+    """Resolver over the bundled list, loaded on first use and shared"""
+    return PublicSuffixResolver()
@@ -0,0 +1,126 @@
+"""
+Phishing Detection - Model Export
+Converts models/lstm_model.pth into alternative inference formats (ONNX, NumPy, mmap bundle)
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from phishing_detector import PhishingDetector
+
+
+# ==================== ONNX ====================
+
+def export_onnx(detector: PhishingDetector, output_path: Path) -> Path:
+    """Export the fp32 BiLSTMClassifier to ONNX with dynamic batch and sequence axes"""
+    import torch
+
+    model = detector.load_model('fp32').cpu()
+    example = torch.zeros((1, detector.max_len), dtype=torch.int64)
+    export_args = dict(
+        input_names=['input_ids'],
+        output_names=['confidence'],
+        dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'}, 'confidence': {0: 'batch'}},
+        opset_version=17
+    )
+
+    # nn.LSTM exports to a fused ONNX LSTM op through the TorchScript exporter
+    try:
+        torch.onnx.export(model, (example,), str(output_path), dynamo=False, **export_args)
+    except TypeError:
+        torch.onnx.export(model, (example,), str(output_path), **export_args)
+
+    return output_path
+
+
+# ==================== NUMPY ====================
+
+def export_numpy(detector: PhishingDetector, output_path: Path) -> Path:
+    """Dump the fp32 BiLSTMClassifier weights to a flat .npz array file for numpy_engine.py"""
+    import numpy as np
+
+    model = detector.load_model('fp32').cpu()
+    weights = {name: tensor.detach().numpy().astype(np.float32)
+               for name, tensor in model.state_dict().items()}
+
+    # Written uncompressed so loading is a straight read with no inflate step
+    with open(output_path, 'wb') as f:
+        np.savez(f, **weights)
+
+    return output_path
+
+
+# ==================== BUNDLE ====================
+
+def export_bundle(detector: PhishingDetector, output_path: Path, fold_embedding: bool = False) -> Path:
+    """Write fp32 weights and the tokenizer vocabulary into one memory-mappable model.bundle"""
+    import numpy as np
+    from model_bundle import ModelBundle, vocabulary_arrays
+    from numpy_engine import NumpyBiLSTM
+
+    model = detector.load_model('fp32').cpu()
+    weights = {name: tensor.detach().numpy().astype(np.float32)
+               for name, tensor in model.state_dict().items()}
+
+    if fold_embedding:
+        # Store the lstm1 gate tables instead of the embedding they are derived from
+        engine = NumpyBiLSTM(weights, fold_embedding=True)
+        weights = dict(engine.weights)
+        for suffix, table in engine.gate_tables.items():
+            weights[f'lstm1.gate_table{suffix}'] = table
+
+    arrays = {f'lstm.{name}': array for name, array in weights.items()}
+    arrays.update(vocabulary_arrays(detector.tokenizer.word2idx))
+
+    ModelBundle.write(output_path, arrays, {
+        'max_len': detector.max_len,
+        'vocab_size': len(detector.tokenizer),
+        'folded_embedding': fold_embedding,
+        'created_at': datetime.now().isoformat()
+    })
+
+    return output_path
+
+
+EXPORTERS = {
+    'onnx': (export_onnx, PhishingDetector.ONNX_MODEL_FILE),
+    'numpy': (export_numpy, PhishingDetector.NUMPY_MODEL_FILE),
+    'bundle': (export_bundle, PhishingDetector.BUNDLE_FILE),
+}
+
+
+# ==================== MAIN FUNCTION ====================
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Phishing Detection Model Export')
+    parser.add_argument('format', choices=sorted(EXPORTERS), help='Export format')
+    parser.add_argument('--model-dir', default='models', help='Directory with model files')
+    parser.add_argument('--output', help='Output path (default: next to lstm_model.pth)')
+    parser.add_argument('--fold-embedding', action='store_true',
+                        help='bundle only: store precomputed lstm1 gate tables instead of the embedding')
+    args = parser.parse_args()
+
+    if args.fold_embedding and args.format != 'bundle':
+        parser.error('--fold-embedding only applies to the bundle format')
+
+    exporter, default_name = EXPORTERS[args.format]
+    output_path = Path(args.output) if args.output else Path(args.model_dir) / default_name
+
+    try:
+        detector = PhishingDetector(model_dir=args.model_dir)
+    except Exception as e:
+        print(f"ERROR: Could not load model: {e}")
+        sys.exit(1)
+
+    print(f"\nExporting {args.format} model...")
+    if args.fold_embedding:
+        exporter(detector, output_path, fold_embedding=True)
+    else:
+        exporter(detector, output_path)
+    print(f"Exported to: {output_path} ({output_path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Phishing Email Detection - PyTorch Model
+BiLSTMClassifier definition, kept apart so torch-free backends never import torch
+"""
+import torch
+import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+
+class BiLSTMClassifier(nn.Module):
+    """Bidirectional LSTM for phishing detection"""
+    def __init__(self, vocab_size, embedding_dim, lstm_units, dropout_rate):
+        super(BiLSTMClassifier, self).__init__()
+        
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
+        self.lstm1 = nn.LSTM(embedding_dim, lstm_units, batch_first=True, bidirectional=True)
+        self.dropout1 = nn.Dropout(dropout_rate)
+        self.lstm2 = nn.LSTM(lstm_units * 2, lstm_units // 2, batch_first=True, bidirectional=True)
+        self.dropout2 = nn.Dropout(dropout_rate)
+        self.fc1 = nn.Linear(lstm_units, 32)
+        self.relu = nn.ReLU()
+        self.dropout3 = nn.Dropout(dropout_rate)
+        self.fc2 = nn.Linear(32, 1)
+        self.sigmoid = nn.Sigmoid()
+    
+    def forward(self, x, lengths=None):
+        if lengths is not None:
+            return self.forward_packed(x, lengths)
+        
+        # Embedding
+        embedded = self.embedding(x)
+        
+        # First LSTM layer
+        lstm_out1, _ = self.lstm1(embedded)
+        lstm_out1 = self.dropout1(lstm_out1)
+        
+        # Second LSTM layer
+        lstm_out2, _ = self.lstm2(lstm_out1)
+        lstm_out2 = self.dropout2(lstm_out2)
+        
+        # Take the last output
+        last_output = lstm_out2[:, -1, :]
+        
+        return self.classify(last_output)
+    
+    def forward_packed(self, x, lengths):
+        """Forward pass over packed sequences, reading each email's real last token"""
+        lengths = torch.as_tensor(lengths, dtype=torch.int64).cpu()
+        embedded = self.embedding(x)
+        packed = pack_padded_sequence(embedded, lengths, batch_first=True, enforce_sorted=False)
+        
+        # LSTM layers skip padded timesteps entirely
+        packed_out1, _ = self.lstm1(packed)
+        packed_out1 = packed_out1._replace(data=self.dropout1(packed_out1.data))
+        packed_out2, _ = self.lstm2(packed_out1)
+        packed_out2 = packed_out2._replace(data=self.dropout2(packed_out2.data))
+        lstm_out2, _ = pad_packed_sequence(packed_out2, batch_first=True)
+        
+        # Take the output at the real last token of each email
+        last_index = (lengths - 1).to(lstm_out2.device)
+        last_output = lstm_out2[torch.arange(lstm_out2.size(0), device=lstm_out2.device), last_index]
+        
+        return self.classify(last_output)
+    
+    def classify(self, last_output):
+        # Fully connected layers
+        fc_out = self.fc1(last_output)
+        fc_out = self.relu(fc_out)
+        fc_out = self.dropout3(fc_out)
+        output = self.fc2(fc_out)
+        output = self.sigmoid(output)
+        
+        return output
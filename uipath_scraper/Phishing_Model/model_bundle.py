@@ -0,0 +1,173 @@
+"""
+Phishing Email Detection - Memory-mapped Model Bundle
+Single-file weights + vocabulary format that loads zero-copy and shares pages across processes
+
+Layout:
+    8 bytes   magic b'PHISHBDL'
+    4 bytes   format version (little-endian uint32)
+    4 bytes   header length (little-endian uint32)
+    N bytes   JSON header: content hash, metadata and an index of named arrays
+    padding   to a 64-byte boundary
+    data      raw little-endian arrays, each starting on a 64-byte boundary
+"""
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class ModelBundle:
+    """Read-only view of a .bundle file; arrays are views into one shared mmap"""
+
+    MAGIC = b'PHISHBDL'
+    FORMAT_VERSION = 1
+    PREAMBLE = struct.Struct('<8sII')
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.mmap = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+        magic, version, header_len = self.PREAMBLE.unpack(bytes(self.mmap[:self.PREAMBLE.size]))
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.path} is not a model bundle")
+        if version != self.FORMAT_VERSION:
+            raise ValueError(f"{self.path} has bundle format {version}, expected {self.FORMAT_VERSION}")
+
+        header_end = self.PREAMBLE.size + header_len
+        self.header = json.loads(bytes(self.mmap[self.PREAMBLE.size:header_end]).decode('utf-8'))
+        self.data_offset = _aligned(header_end)
+        self.content_hash = self.header['content_hash']
+        self.metadata = self.header['metadata']
+
+        self.arrays = {}
+        for name, spec in self.header['arrays'].items():
+            start = self.data_offset + spec['offset']
+            nbytes = int(np.prod(spec['shape'], dtype=np.int64)) * np.dtype(spec['dtype']).itemsize
+            self.arrays[name] = self.mmap[start:start + nbytes].view(spec['dtype']).reshape(spec['shape'])
+
+    def verify(self) -> bool:
+        """Recompute the content hash over the data section"""
+        return hashlib.sha256(self.mmap[self.data_offset:]).hexdigest() == self.content_hash
+
+    def weights(self, prefix: str) -> Dict[str, np.ndarray]:
+        """Arrays whose names start with prefix, with the prefix stripped"""
+        return {name[len(prefix):]: array for name, array in self.arrays.items() if name.startswith(prefix)}
+
+    @classmethod
+    def write(cls, path: Path, arrays: Dict[str, np.ndarray], metadata: Dict) -> str:
+        """Write arrays and metadata as a bundle file and return its content hash"""
+        index = {}
+        chunks = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+            chunks.append(b'\0' * (_aligned(offset) - offset))
+            offset = _aligned(offset)
+            index[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            chunks.append(array.tobytes())
+            offset += array.nbytes
+
+        # Hash the exact data section bytes so caches can key on the bundle
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        header = json.dumps({
+            'format_version': cls.FORMAT_VERSION,
+            'content_hash': content_hash,
+            'metadata': metadata,
+            'arrays': index
+        }).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(cls.PREAMBLE.pack(cls.MAGIC, cls.FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.write(b'\0' * (_aligned(cls.PREAMBLE.size + len(header)) - cls.PREAMBLE.size - len(header)))
+            for chunk in chunks:
+                f.write(chunk)
+
+        return content_hash
+
+
+# ==================== VOCABULARY ====================
+
+def vocabulary_arrays(word2idx: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """Lay out word2idx as sorted fixed-width byte tables, one per UTF-8 length"""
+    by_length = {}
+    for word, idx in word2idx.items():
+        encoded = word.encode('utf-8')
+        by_length.setdefault(len(encoded), []).append((encoded, idx))
+
+    arrays = {}
+    for length, entries in sorted(by_length.items()):
+        entries.sort()
+        arrays[f'vocab.words.{length}'] = np.array([word for word, _ in entries], dtype=f'S{length}')
+        arrays[f'vocab.ids.{length}'] = np.array([idx for _, idx in entries], dtype=np.int32)
+    return arrays
+
+
+class BundleVocabulary:
+    """SimpleTokenizer-compatible lookups straight from memory-mapped bundle tables"""
+
+    def __init__(self, bundle: ModelBundle):
+        self.tables = {}
+        for name, words in bundle.arrays.items():
+            if name.startswith('vocab.words.'):
+                length = int(name.rsplit('.', 1)[1])
+                self.tables[length] = (words, bundle.arrays[f'vocab.ids.{length}'])
+        self.size = sum(len(words) for words, _ in self.tables.values())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def lookup(self, words: List[str]) -> np.ndarray:
+        """Map words to ids with word2idx.get(word, 1) semantics"""
+        encoded = [word.encode('utf-8') for word in words]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        ids = np.ones(len(encoded), dtype=np.int64)
+
+        for length in np.unique(lengths):
+            table = self.tables.get(int(length))
+            if table is None:
+                continue
+            vocab_words, vocab_ids = table
+            positions = np.nonzero(lengths == length)[0]
+            keys = np.array([encoded[i] for i in positions], dtype=vocab_words.dtype)
+            slots = np.minimum(np.searchsorted(vocab_words, keys), len(vocab_words) - 1)
+            found = vocab_words[slots] == keys
+            ids[positions[found]] = vocab_ids[slots[found]]
+
+        return ids
+
+    def texts_to_matrix(self, texts, max_len):
+        """Token ids truncated to max_len, zero-padded into an int64 (len(texts), max_len) matrix"""
+        # Same early-stopping split as SimpleTokenizer.leading_words
+        word_lists = [' '.join(str(text).split(None, max_len)[:max_len]).lower().split() for text in texts]
+        lengths = np.array([len(words) for words in word_lists], dtype=np.int64)
+
+        matrix = np.zeros((len(texts), max_len), dtype=np.int64)
+        matrix[np.arange(max_len) < lengths[:, None]] = self.lookup([word for words in word_lists for word in words])
+        return matrix, lengths
+
+    def texts_to_sequences(self, texts):
+        word_lists = [str(text).lower().split() for text in texts]
+        ids = self.lookup([word for words in word_lists for word in words]).tolist()
+
+        sequences = []
+        start = 0
+        for words in word_lists:
+            sequences.append(ids[start:start + len(words)])
+            start += len(words)
+        return sequences
@@ -0,0 +1,110 @@
+"""
+Phishing Email Detection - NumPy Inference Engine
+Torch-free forward pass of BiLSTMClassifier (eval mode) for fast cold starts
+"""
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    """Overflow-free logistic function"""
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+class NumpyBiLSTM:
+    """Embedding -> 2x bidirectional LSTM -> FC -> sigmoid, batched, in NumPy"""
+
+    DIRECTIONS = ('', '_reverse')
+
+    def __init__(self, weights: Dict[str, np.ndarray], fold_embedding: bool = False):
+        self.weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+        self.gate_tables = None
+
+        if 'lstm1.gate_table' in self.weights:
+            # Tables folded at export time (export_model.py bundle --fold-embedding)
+            self.gate_tables = {suffix: self.weights.pop(f'lstm1.gate_table{suffix}')
+                                for suffix in self.DIRECTIONS}
+        elif fold_embedding:
+            # lstm1 only ever sees embedding rows, so embedding @ W_ih.T + b can be
+            # computed once per vocabulary word and the per-step GEMM becomes a gather
+            embedding = self.weights.pop('embedding.weight')
+            self.gate_tables = {suffix: self.project_inputs(embedding, 'lstm1', suffix)
+                                for suffix in self.DIRECTIONS}
+
+    @classmethod
+    def load(cls, path: Path, fold_embedding: bool = False) -> 'NumpyBiLSTM':
+        """Load weights written by export_model.py numpy"""
+        with np.load(path) as archive:
+            return cls({name: archive[name] for name in archive.files}, fold_embedding)
+
+    def project_inputs(self, inputs: np.ndarray, prefix: str, suffix: str) -> np.ndarray:
+        """Input-to-hidden projection plus both biases; gate order is i, f, g, o"""
+        w_ih = self.weights[f'{prefix}.weight_ih_l0{suffix}']
+        bias = self.weights[f'{prefix}.bias_ih_l0{suffix}'] + self.weights[f'{prefix}.bias_hh_l0{suffix}']
+        return inputs @ w_ih.T + bias
+
+    def lstm_direction(self, projected: np.ndarray, prefix: str, suffix: str,
+                       mask: np.ndarray, reverse: bool) -> np.ndarray:
+        """Run one LSTM direction over (batch, time, 4 * hidden) projected inputs"""
+        w_hh_t = np.ascontiguousarray(self.weights[f'{prefix}.weight_hh_l0{suffix}'].T)
+        hidden_size = w_hh_t.shape[0]
+        batch, steps, _ = projected.shape
+
+        h = np.zeros((batch, hidden_size), dtype=np.float32)
+        c = np.zeros((batch, hidden_size), dtype=np.float32)
+        outputs = np.zeros((batch, steps, hidden_size), dtype=np.float32)
+
+        for t in (range(steps - 1, -1, -1) if reverse else range(steps)):
+            gates = projected[:, t] + h @ w_hh_t
+            i = sigmoid(gates[:, :hidden_size])
+            f = sigmoid(gates[:, hidden_size:2 * hidden_size])
+            g = np.tanh(gates[:, 2 * hidden_size:3 * hidden_size])
+            o = sigmoid(gates[:, 3 * hidden_size:])
+            c_next = f * c + i * g
+            h_next = o * np.tanh(c_next)
+
+            if mask is None:
+                h, c = h_next, c_next
+            else:
+                # Padded steps keep the state untouched, like a packed sequence
+                step_mask = mask[:, t:t + 1]
+                h = np.where(step_mask, h_next, h)
+                c = np.where(step_mask, c_next, c)
+            outputs[:, t] = h
+
+        return outputs
+
+    def bidirectional(self, projected: Dict[str, np.ndarray], prefix: str, mask: np.ndarray) -> np.ndarray:
+        """Concatenate forward and reverse outputs like nn.LSTM(bidirectional=True)"""
+        forward = self.lstm_direction(projected[''], prefix, '', mask, reverse=False)
+        backward = self.lstm_direction(projected['_reverse'], prefix, '_reverse', mask, reverse=True)
+        return np.concatenate([forward, backward], axis=2)
+
+    def __call__(self, padded: np.ndarray, lengths: List[int] = None) -> np.ndarray:
+        """Return phishing confidences for a padded (batch, time) id matrix"""
+        mask = None
+        if lengths is not None:
+            lengths = np.asarray(lengths, dtype=np.int64)
+            mask = np.arange(padded.shape[1])[None, :] < lengths[:, None]
+
+        if self.gate_tables is not None:
+            projected1 = {suffix: table[padded] for suffix, table in self.gate_tables.items()}
+        else:
+            embedded = self.weights['embedding.weight'][padded]
+            projected1 = {suffix: self.project_inputs(embedded, 'lstm1', suffix) for suffix in self.DIRECTIONS}
+        lstm_out1 = self.bidirectional(projected1, 'lstm1', mask)
+
+        projected2 = {suffix: self.project_inputs(lstm_out1, 'lstm2', suffix) for suffix in self.DIRECTIONS}
+        lstm_out2 = self.bidirectional(projected2, 'lstm2', mask)
+
+        # Last output: position -1 for fixed padding, real last token otherwise
+        if lengths is None:
+            last_output = lstm_out2[:, -1, :]
+        else:
+            last_output = lstm_out2[np.arange(len(lengths)), lengths - 1]
+
+        fc_out = np.maximum(last_output @ self.weights['fc1.weight'].T + self.weights['fc1.bias'], 0.0)
+        output = fc_out @ self.weights['fc2.weight'].T + self.weights['fc2.bias']
+        return sigmoid(output).reshape(-1)
@@ -0,0 +1,57 @@
+"""
+Phishing Email Detection - Multi-pattern Matcher
+Reports every hit from several named substring lists in one scan of a string
+"""
+import re
+from typing import Dict, Iterable, List
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a character trie; optional tails are greedy so the longest pattern wins"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return '(?:' + body + ')?' if '' in node else body
+
+
+class MultiPatternMatcher:
+    """Precompiled trie over the patterns of all lists, scanned once per string"""
+
+    def __init__(self, pattern_lists: Dict[str, Iterable[str]]):
+        self.pattern_lists = {name: list(patterns) for name, patterns in pattern_lists.items()}
+
+        # pattern -> [(list name, position in that list)]
+        self.memberships = {}
+        trie = {}
+        for name, patterns in self.pattern_lists.items():
+            for position, pattern in enumerate(patterns):
+                if not pattern:
+                    raise ValueError(f"Empty pattern in list '{name}'")
+                self.memberships.setdefault(pattern, []).append((name, position))
+                node = trie
+                for char in pattern:
+                    node = node.setdefault(char, {})
+                node[''] = True
+
+        # The trie is compiled into one regex inside a lookahead: the scan visits every
+        # position once, and the work per position is bounded by the longest pattern
+        # rather than the number of patterns. Each position reports its longest match;
+        # shorter patterns starting there are its prefixes, looked up from this table.
+        self.prefix_hits = {pattern: [pattern[:end] for end in range(1, len(pattern) + 1)
+                                      if pattern[:end] in self.memberships]
+                            for pattern in self.memberships}
+        self.regex = re.compile('(?=(' + _trie_pattern(trie) + '))') if trie else None
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Hits per list name, in list order; lists without hits are left out"""
+        if self.regex is None:
+            return {}
+
+        hits = {}
+        for longest in set(self.regex.findall(text)):
+            for pattern in self.prefix_hits[longest]:
+                for name, position in self.memberships[pattern]:
+                    hits.setdefault(name, {})[position] = pattern
+
+        return {name: [found[position] for position in sorted(found)] for name, found in hits.items()}
@@ -2,23 +2,29 @@
 Phishing Email Detection - Production Pipeline
 Accepts frontend JSON format and returns detailed analysis
 """
+import copy
+import hashlib
+import importlib.util
 import json
+import pickle
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any
-import re
+from collections import Counter
 
-# Try importing required packages
+from batch_features import MONEY_SYMBOLS, FeatureBatch, count_char_classes
+from campaign_index import CampaignIndex
+from pattern_matcher import MultiPatternMatcher
+from result_cache import ResultCache
+from url_cache import UrlVerdictCache
+from url_context import IP_PATTERN, URL_PATTERN, ParsedUrl, UrlContext
+from url_rules import UrlRuleEngine
+
+# Try importing required packages (heavier ones - torch, onnxruntime -
+# are imported inside the code paths that need them to keep CLI startup short)
 try:
-    import torch
-    import torch.nn as nn
-    from torch.utils.data import Dataset
-    import joblib
     import numpy as np
-    import pandas as pd
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    import tldextract
 except ImportError as e:
     print(f"ERROR: Missing required package. Please run: pip install -r requirements.txt")
     sys.exit(1)
@@ -44,53 +50,46 @@ class SimpleTokenizer:
             self.word2idx[word] = idx
             self.idx2word[idx] = word
     
+    def __len__(self):
+        return len(self.word2idx)
+    
     def texts_to_sequences(self, texts):
         sequences = []
         for text in texts:
             seq = [self.word2idx.get(word, 1) for word in str(text).lower().split()]
             sequences.append(seq)
         return sequences
+    
+    @staticmethod
+    def leading_words(text, max_len):
+        """First max_len words of str(text).lower().split(), without scanning the rest"""
+        # split() stops after max_len cuts; lowercasing never creates or removes whitespace
+        words = str(text).split(None, max_len)[:max_len]
+        return ' '.join(words).lower().split()
+    
+    def texts_to_matrix(self, texts, max_len):
+        """Token ids truncated to max_len, zero-padded into an int64 (len(texts), max_len) matrix"""
+        get = self.word2idx.get
+        ids = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            words = self.leading_words(text, max_len)
+            ids.extend([get(word, 1) for word in words])
+            lengths[row] = len(words)
+        
+        matrix = np.zeros((len(texts), max_len), dtype=np.int64)
+        matrix[np.arange(max_len) < lengths[:, None]] = ids
+        return matrix, lengths
 
 
-class BiLSTMClassifier(nn.Module):
-    """Bidirectional LSTM for phishing detection"""
-    def __init__(self, vocab_size, embedding_dim, lstm_units, dropout_rate):
-        super(BiLSTMClassifier, self).__init__()
-        
-        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
-        self.lstm1 = nn.LSTM(embedding_dim, lstm_units, batch_first=True, bidirectional=True)
-        self.dropout1 = nn.Dropout(dropout_rate)
-        self.lstm2 = nn.LSTM(lstm_units * 2, lstm_units // 2, batch_first=True, bidirectional=True)
-        self.dropout2 = nn.Dropout(dropout_rate)
-        self.fc1 = nn.Linear(lstm_units, 32)
-        self.relu = nn.ReLU()
-        self.dropout3 = nn.Dropout(dropout_rate)
-        self.fc2 = nn.Linear(32, 1)
-        self.sigmoid = nn.Sigmoid()
-    
-    def forward(self, x):
-        # Embedding
-        embedded = self.embedding(x)
-        
-        # First LSTM layer
-        lstm_out1, _ = self.lstm1(embedded)
-        lstm_out1 = self.dropout1(lstm_out1)
-        
-        # Second LSTM layer
-        lstm_out2, _ = self.lstm2(lstm_out1)
-        lstm_out2 = self.dropout2(lstm_out2)
-        
-        # Take the last output
-        last_output = lstm_out2[:, -1, :]
-        
-        # Fully connected layers
-        fc_out = self.fc1(last_output)
-        fc_out = self.relu(fc_out)
-        fc_out = self.dropout3(fc_out)
-        output = self.fc2(fc_out)
-        output = self.sigmoid(output)
-        
-        return output
+class TokenizerUnpickler(pickle.Unpickler):
+    """Unpickler for tokenizer.pkl, which was pickled from a training script run as __main__"""
+    
+    def find_class(self, module, name):
+        # Whatever SimpleTokenizer the running __main__ defines (if any), load this module's class
+        if module == '__main__' and name == 'SimpleTokenizer':
+            return SimpleTokenizer
+        return super().find_class(module, name)
 
 
 # ==================== FEATURE EXTRACTION ====================
@@ -98,15 +97,30 @@ class BiLSTMClassifier(nn.Module):
 class EmailFeatureExtractor:
     """Extract custom features from email data"""
     
-    def __init__(self):
-        self.url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-        self.ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
-        self.phishing_keywords = ['login', 'reset', 'verify', 'confirm', 'account', 'suspended', 
-                                   'urgent', 'click', 'update', 'password', 'security', 'expire']
+    MONEY_SYMBOLS = MONEY_SYMBOLS
+    PHISHING_KEYWORDS = ('login', 'reset', 'verify', 'confirm', 'account', 'suspended',
+                         'urgent', 'click', 'update', 'password', 'security', 'expire')
+    MALICIOUS_EXTENSIONS = ('.sh', '.exe', '.bat', '.scr', '.vbs')
+    PATTERN_LISTS = {
+        'phishing_keywords': PHISHING_KEYWORDS,
+        'malicious_extensions': MALICIOUS_EXTENSIONS,
+    }
+    
+    def __init__(self, matcher: MultiPatternMatcher = None):
+        self.url_pattern = URL_PATTERN
+        self.ip_pattern = IP_PATTERN
+        self.phishing_keywords = list(self.PHISHING_KEYWORDS)
+        # PhishingDetector passes its shared matcher, which also holds the URL rule lists
+        self.matcher = matcher or MultiPatternMatcher(self.PATTERN_LISTS)
+    
+    def url_context(self, body: str, scraped_urls: List[str] = ()) -> UrlContext:
+        """Extract and parse an email's URLs once for all stages"""
+        return UrlContext(body, scraped_urls, self.matcher)
     
-    def extract_url_features(self, text: str) -> dict:
+    def extract_url_features(self, text: str, urls: List[ParsedUrl] = None) -> dict:
         """Extract URL-based features"""
-        urls = self.url_pattern.findall(str(text))
+        if urls is None:
+            urls = self.url_context(text).body_urls
         
         features = {
             'num_urls': len(urls),
@@ -124,22 +138,18 @@ class EmailFeatureExtractor:
             total_dots = 0
             total_digits = 0
             
-            for url in urls:
-                extracted = tldextract.extract(url)
-                domain = f"{extracted.domain}.{extracted.suffix}"
-                domains.add(domain)
-                total_length += len(url)
+            for parsed in urls:
+                domains.add(parsed.registered_domain)
+                total_length += len(parsed.url)
                 
-                if self.ip_pattern.search(url):
+                if parsed.has_ip:
                     features['has_ip'] = 1
                 
-                total_dots += url.count('.')
-                total_digits += sum(c.isdigit() for c in url)
+                total_dots += parsed.url.count('.')
+                total_digits += sum(c.isdigit() for c in parsed.url)
                 
-                for keyword in self.phishing_keywords:
-                    if keyword in url.lower():
-                        features['has_phishing_keywords_in_url'] = 1
-                        break
+                if 'phishing_keywords' in parsed.hits:
+                    features['has_phishing_keywords_in_url'] = 1
             
             features['num_unique_domains'] = len(domains)
             features['avg_url_length'] = total_length / len(urls)
@@ -150,34 +160,50 @@ class EmailFeatureExtractor:
     
     def extract_text_features(self, subject: str, body: str) -> dict:
         """Extract text-based features"""
+        return self.scan_text(subject, body)[0]
+    
+    def scan_text(self, subject: str, body: str) -> tuple:
+        """Text features plus malicious extensions found in body, from one character histogram"""
         full_text = f"{subject} {body}"
         
+        # One C-level pass builds the histogram; each distinct character is classified once
+        histogram = Counter(full_text)
+        num_uppercase = num_digits = num_special = 0
+        for char, count in histogram.items():
+            if char.isupper():
+                num_uppercase += count
+            if char.isdigit():
+                num_digits += count
+            if not char.isalnum() and not char.isspace():
+                num_special += count
+        
         features = {
             'subject_len': len(str(subject)),
             'body_len': len(str(body)),
-            'num_uppercase': sum(1 for c in full_text if c.isupper()),
-            'num_digits': sum(1 for c in full_text if c.isdigit()),
-            'num_special_chars': sum(1 for c in full_text if not c.isalnum() and not c.isspace()),
-            'has_money_symbol': int(any(symbol in full_text for symbol in ['$', '€', '₹', '£', '¥'])),
-            'num_exclamation': full_text.count('!'),
-            'num_question': full_text.count('?'),
+            'num_uppercase': num_uppercase,
+            'num_digits': num_digits,
+            'num_special_chars': num_special,
+            'has_money_symbol': int(any(symbol in histogram for symbol in self.MONEY_SYMBOLS)),
+            'num_exclamation': histogram['!'],
+            'num_question': histogram['?'],
             'has_phishing_keywords': 0,
             'ratio_uppercase': 0,
             'ratio_digits': 0,
         }
         
-        for keyword in self.phishing_keywords:
-            if keyword in full_text.lower():
-                features['has_phishing_keywords'] = 1
-                break
+        # Lowercase once; the separating space keeps keywords from spanning subject and body
+        subject_hits = self.matcher.scan(str(subject).lower())
+        body_hits = self.matcher.scan(str(body).lower())
+        if 'phishing_keywords' in subject_hits or 'phishing_keywords' in body_hits:
+            features['has_phishing_keywords'] = 1
         
         if len(full_text) > 0:
             features['ratio_uppercase'] = features['num_uppercase'] / len(full_text)
             features['ratio_digits'] = features['num_digits'] / len(full_text)
         
-        return features
+        return features, body_hits.get('malicious_extensions', [])
     
-    def extract_sender_features(self, sender: str, body: str) -> dict:
+    def extract_sender_features(self, sender: str, body: str, urls: List[ParsedUrl] = None) -> dict:
         """Extract sender-based features"""
         features = {
             'sender_domain_mismatch': 0,
@@ -193,15 +219,108 @@ class EmailFeatureExtractor:
             sender_domain = str(sender).split('@')[-1].lower()
         
         if sender_domain:
-            urls = self.url_pattern.findall(str(body))
-            for url in urls:
-                extracted = tldextract.extract(url)
-                url_domain = f"{extracted.domain}.{extracted.suffix}".lower()
+            if urls is None:
+                urls = self.url_context(body).body_urls
+            for parsed in urls:
+                url_domain = parsed.registered_domain.lower()
                 if url_domain and url_domain != sender_domain:
                     features['sender_domain_mismatch'] = 1
                     break
         
         return features
+    
+    def extract_batch(self, emails: List[Dict], urls: List[UrlContext]) -> FeatureBatch:
+        """URL, text and sender features of many emails (model-format dicts) as column arrays"""
+        subjects = [str(email['subject']) for email in emails]
+        bodies = [str(email['body']) for email in emails]
+        senders = [str(email['sender']) for email in emails]
+        full_texts = [f"{subject} {body}" for subject, body in zip(subjects, bodies)]
+        columns = {}
+        
+        # Text: character classes of every email from one buffer; keyword/extension scans per email
+        chars = count_char_classes(full_texts, ('upper', 'digit', 'special', 'exclamation', 'question', 'money'))
+        text_lengths = np.array([len(text) for text in full_texts], dtype=np.float64)
+        columns['subject_len'] = np.array([len(subject) for subject in subjects], dtype=np.int64)
+        columns['body_len'] = np.array([len(body) for body in bodies], dtype=np.int64)
+        columns['num_uppercase'] = chars['upper']
+        columns['num_digits'] = chars['digit']
+        columns['num_special_chars'] = chars['special']
+        columns['has_money_symbol'] = (chars['money'] > 0).astype(np.int64)
+        columns['num_exclamation'] = chars['exclamation']
+        columns['num_question'] = chars['question']
+        columns['ratio_uppercase'] = chars['upper'] / text_lengths
+        columns['ratio_digits'] = chars['digit'] / text_lengths
+        
+        has_keywords = np.zeros(len(emails), dtype=np.int64)
+        malicious_extensions = []
+        for i, (subject, body) in enumerate(zip(subjects, bodies)):
+            subject_hits = self.matcher.scan(subject.lower())
+            body_hits = self.matcher.scan(body.lower())
+            has_keywords[i] = 'phishing_keywords' in subject_hits or 'phishing_keywords' in body_hits
+            malicious_extensions.append(body_hits.get('malicious_extensions', []))
+        columns['has_phishing_keywords'] = has_keywords
+        
+        # URLs: per-URL digit/dot counts from one buffer, summed per email
+        body_urls = [context.body_urls for context in urls]
+        flat_urls = [parsed.url for email_urls in body_urls for parsed in email_urls]
+        url_chars = count_char_classes(flat_urls, ('digit', 'dot'))
+        num_urls = np.array([len(email_urls) for email_urls in body_urls], dtype=np.int64)
+        with_urls = np.flatnonzero(num_urls)
+        starts = (np.cumsum(num_urls) - num_urls)[with_urls]
+        
+        def per_email(values: np.ndarray) -> np.ndarray:
+            totals = np.zeros(len(emails), dtype=np.float64)
+            if len(with_urls):
+                totals[with_urls] = np.add.reduceat(values, starts)
+            return totals
+        
+        divisor = np.maximum(num_urls, 1)
+        columns['num_urls'] = num_urls
+        columns['num_unique_domains'] = np.array([len({parsed.registered_domain for parsed in email_urls})
+                                                  for email_urls in body_urls], dtype=np.int64)
+        columns['has_ip'] = np.array([any(parsed.has_ip for parsed in email_urls)
+                                      for email_urls in body_urls], dtype=np.int64)
+        columns['has_phishing_keywords_in_url'] = np.array(
+            [any('phishing_keywords' in parsed.hits for parsed in email_urls) for email_urls in body_urls],
+            dtype=np.int64)
+        columns['avg_url_length'] = per_email(np.array([len(url) for url in flat_urls], dtype=np.float64)) / divisor
+        columns['num_dots_in_url'] = per_email(url_chars['dot'].astype(np.float64)) / divisor
+        columns['num_digits_in_url'] = per_email(url_chars['digit'].astype(np.float64)) / divisor
+        
+        # Sender
+        columns['sender_length'] = np.array([len(sender) for sender in senders], dtype=np.int64)
+        columns['sender_has_numbers'] = (count_char_classes(senders, ('digit',))['digit'] > 0).astype(np.int64)
+        mismatch = np.zeros(len(emails), dtype=np.int64)
+        for i, (sender, email_urls) in enumerate(zip(senders, body_urls)):
+            sender_domain = sender.split('@')[-1].lower() if '@' in sender else ''
+            if sender_domain:
+                mismatch[i] = any(parsed.registered_domain.lower() not in ('', sender_domain)
+                                  for parsed in email_urls)
+        columns['sender_domain_mismatch'] = mismatch
+        
+        return FeatureBatch(urls, columns, malicious_extensions)
+
+
+# ==================== BACKEND HELPERS ====================
+
+def torch_available() -> bool:
+    """Check whether PyTorch is installed without importing it"""
+    return importlib.util.find_spec('torch') is not None
+
+
+def parity_report(reference: List[tuple], candidate: List[tuple]) -> Dict[str, Any]:
+    """Compare two lists of (is_phishing, confidence) predictions"""
+    deltas = [abs(ref[1] - cand[1]) for ref, cand in zip(reference, candidate)]
+    agreements = sum(1 for ref, cand in zip(reference, candidate) if ref[0] == cand[0])
+    total = len(deltas)
+    
+    return {
+        'emails_compared': total,
+        'verdict_agreement': round(agreements / total, 4) if total else 1.0,
+        'verdict_disagreements': total - agreements,
+        'max_confidence_delta': max(deltas) if deltas else 0.0,
+        'mean_confidence_delta': sum(deltas) / total if total else 0.0
+    }
 
 
 # ==================== PHISHING DETECTOR ====================
@@ -209,33 +328,312 @@ class EmailFeatureExtractor:
 class PhishingDetector:
     """Main phishing detection class"""
     
-    def __init__(self, model_dir='models'):
-        self.model_dir = Path(model_dir)
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.feature_extractor = EmailFeatureExtractor()
-        
-        print(f"Loading model on device: {self.device}")
+    PADDING_MODES = ('fixed', 'dynamic')
+    PRECISIONS = ('fp32', 'int8', 'bf16')
+    BACKENDS = ('torch', 'onnx', 'numpy')
+    ONNX_MODEL_FILE = 'lstm_model.onnx'
+    NUMPY_MODEL_FILE = 'lstm_model.npz'
+    BUNDLE_FILE = 'model.bundle'
+    MODEL_TYPES = {'torch': 'LSTM (PyTorch)', 'onnx': 'LSTM (ONNX Runtime)', 'numpy': 'LSTM (NumPy)'}
+    CASCADE_MODEL_TYPE = 'Linear TF-IDF (cascade)'
+    REFERENCE_EMAILS = Path(__file__).parent / 'examples' / 'sample_emails.json'
+    # Bump when analyze_email's output for the same email and model changes (invalidates cached results)
+    ANALYSIS_VERSION = 2
+    
+    def __init__(self, model_dir='models', batch_size=64, padding='fixed', precision='fp32',
+                 backend='torch', fold_embedding=False, workers=1, use_bundle=False,
+                 url_cache_size=65536, url_cache_path=None, result_cache_size=4096,
+                 result_cache_path=None, campaign_threshold=None, cascade_band=None):
+        if backend == 'torch' and not torch_available():
+            print("WARNING: PyTorch is not installed, falling back to the numpy backend")
+            backend = 'numpy'
+        if padding not in self.PADDING_MODES:
+            raise ValueError(f"padding must be one of {self.PADDING_MODES}, got {padding!r}")
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"precision must be one of {self.PRECISIONS}, got {precision!r}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {self.BACKENDS}, got {backend!r}")
+        if backend != 'torch' and precision != 'fp32':
+            raise ValueError(f"The {backend} backend only supports precision='fp32'")
+        if backend == 'onnx' and padding != 'fixed':
+            raise ValueError("The onnx backend only supports padding='fixed'")
+        if fold_embedding and backend != 'numpy':
+            raise ValueError("fold_embedding is only available with the numpy backend")
         
-        # Load tokenizer
-        tokenizer_path = self.model_dir / 'tokenizer.pkl'
-        with open(tokenizer_path, 'rb') as f:
-            self.tokenizer = joblib.load(f)
+        self.model_dir = Path(model_dir)
+        self.backend = backend
+        if backend == 'torch':
+            import torch
+            # Dynamically quantized modules only have CPU kernels
+            use_cuda = torch.cuda.is_available() and precision != 'int8'
+            self.device = torch.device('cuda' if use_cuda else 'cpu')
+        else:
+            # onnx and numpy backends run on the CPU without importing torch
+            self.device = 'cpu'
+        if precision == 'bf16' and not self.bf16_supported():
+            print("WARNING: bf16 is not supported on this device, falling back to fp32")
+            precision = 'fp32'
+        self.precision = precision
+        # One matcher for every keyword/extension list, shared by all stages
+        self.matcher = MultiPatternMatcher({**EmailFeatureExtractor.PATTERN_LISTS, **UrlRuleEngine.PATTERN_LISTS})
+        self.feature_extractor = EmailFeatureExtractor(self.matcher)
+        self.url_rules = UrlRuleEngine(self.matcher)
+        # URL verdicts shared across emails; url_cache_path keeps them across restarts
+        self.url_cache = None
+        if url_cache_size:
+            self.url_cache = UrlVerdictCache(self.url_rules.version, url_cache_size, url_cache_path)
+        self.max_len = 200
+        self.batch_size = batch_size
+        # 'fixed' pads every email to max_len (training behaviour); 'dynamic'
+        # buckets emails by length and runs the LSTMs on packed sequences
+        self.padding = padding
+        # Precompute embedding @ lstm1 input weights per vocab word (numpy backend)
+        self.fold_embedding = fold_embedding
+        
+        print(f"Loading model on device: {self.device} ({self.precision})")
+        
+        # Load tokenizer (memory-mapped from model.bundle, or unpickled)
+        self.bundle = None
+        self.model_hash = None
+        if use_bundle:
+            from model_bundle import BundleVocabulary
+            self.bundle = self.load_bundle()
+            self.model_hash = self.bundle.content_hash
+            self.tokenizer = BundleVocabulary(self.bundle)
+        else:
+            tokenizer_path = self.model_dir / 'tokenizer.pkl'
+            with open(tokenizer_path, 'rb') as f:
+                self.tokenizer = TokenizerUnpickler(f).load()
         
         # Load model
+        if backend == 'onnx':
+            self.model = None
+            self.session = self.load_onnx_session()
+        elif backend == 'numpy':
+            self.model = None
+            self.engine = self.load_numpy_engine()
+        else:
+            self.model = self.load_model(self.precision)
+        
+        print(f"Model loaded successfully ({self.backend} backend)")
+        
+        # Near-duplicate emails (campaign copies) reuse their cluster's model score
+        self.campaigns = None
+        if campaign_threshold is not None:
+            self.campaigns = CampaignIndex(threshold=campaign_threshold)
+        
+        # Cascade: a linear TF-IDF scorer settles emails outside the (low, high) band,
+        # only the uncertain middle goes to the LSTM
+        self.cascade = None
+        if cascade_band is not None:
+            from cascade_scorer import CascadeScorer
+            self.cascade = CascadeScorer.load(self.model_dir, tuple(cascade_band))
+            print(f"Cascade scorer loaded (LSTM band {self.cascade.band[0]}-{self.cascade.band[1]})")
+        
+        # Whole results for repeated email content (campaign copies, newsletters);
+        # result_cache_path adds an on-disk tier shared by runs with the same model
+        self.result_cache = None
+        if result_cache_size:
+            self.result_cache = ResultCache(self.analysis_namespace(), result_cache_size, result_cache_path)
+        
+        # Worker processes share this detector's weights (fork) or load their own (spawn)
+        self.pool = None
+        if workers > 1:
+            from scoring_pool import ScoringPool
+            self.pool = ScoringPool(self, workers, {
+                'model_dir': model_dir, 'batch_size': batch_size, 'padding': self.padding,
+                'precision': self.precision, 'backend': self.backend,
+                'fold_embedding': fold_embedding, 'use_bundle': use_bundle, 'cascade_band': cascade_band
+            })
+            print(f"Started {workers} scoring workers "
+                  f"({self.pool.threads_per_worker} thread(s) each)")
+    
+    def close(self):
+        """Shut down the scoring worker processes, if any, and persist the URL verdict cache"""
+        self.save_url_cache()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+    
+    def analysis_namespace(self) -> str:
+        """Hash of everything besides the email itself that shapes analyze_email's output"""
+        model = self.model_hash
+        if model is None:
+            # Without a bundle there is no content hash: identify the model files by size and mtime
+            weights = {'torch': 'lstm_model.pth', 'onnx': self.ONNX_MODEL_FILE, 'numpy': self.NUMPY_MODEL_FILE}
+            model = []
+            for path in (self.model_dir / 'tokenizer.pkl', self.model_dir / weights[self.backend]):
+                stat = path.stat()
+                model.append([path.name, stat.st_size, stat.st_mtime_ns])
+        
+        return hashlib.sha256(json.dumps({
+            'model': model,
+            'backend': self.backend,
+            'precision': self.precision,
+            'padding': self.padding,
+            'max_len': self.max_len,
+            'url_rules': self.url_rules.version,
+            'pattern_lists': self.matcher.pattern_lists,
+            'campaign_threshold': self.campaigns.threshold if self.campaigns is not None else None,
+            'cascade': [list(self.cascade.band), hashlib.sha256(self.cascade.coef.tobytes()).hexdigest(),
+                        self.cascade.intercept] if self.cascade is not None else None,
+            'analysis_version': self.ANALYSIS_VERSION
+        }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    
+    def result_key(self, email_data: Dict) -> str:
+        """Result cache key: every field the analysis reads (subject, body, sender, scraped URLs, attachments)"""
+        email = self.convert_frontend_to_model_format(email_data)
+        # num_attachments is one of the cascade scorer's features (cascade_scorer.feature_columns)
+        return self.result_cache.key([email['subject'], email['body'], email['sender'],
+                                      email_data.get('urls_found', []), email_data.get('num_attachments', 0)])
+    
+    def fill_result(self, result: Dict, email_data: Dict) -> Dict:
+        """Replace the per-email fields of a reused result (a copy: it is modified) with this email's own"""
+        result['email_id'] = email_data.get('email_id')
+        # Same defaults as analyze_email; the cache key reads a missing subject or sender as ''
+        # (FAILED results only carry email_id)
+        for field in ('sender', 'sender_domain', 'subject', 'date_received'):
+            if field in result:
+                result[field] = email_data.get(field)
+        if 'url_analysis' in result:
+            result['url_analysis']['total_urls'] = email_data.get('url_count', 0)
+        if 'analysis_metadata' in result:
+            result['analysis_metadata']['analyzed_at'] = datetime.now().isoformat()
+        return result
+    
+    def save_url_cache(self):
+        """Write the URL verdict cache to url_cache_path (no-op without one)"""
+        if self.url_cache is not None and self.url_cache.path is not None:
+            try:
+                self.url_cache.save()
+            except OSError as e:
+                print(f"WARNING: Could not save URL verdict cache: {e}")
+    
+    def bf16_supported(self) -> bool:
+        """Check whether the inference device has usable bfloat16 kernels"""
+        import torch
+        
+        if self.device.type == 'cuda':
+            return torch.cuda.is_bf16_supported()
+        try:
+            return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except (AttributeError, RuntimeError):
+            return False
+    
+    def load_model(self, precision: str = 'fp32'):
+        """Load lstm_model.pth and convert it to the requested precision"""
+        import torch
+        import torch.nn as nn
+        from lstm_model import BiLSTMClassifier
+        
         model_path = self.model_dir / 'lstm_model.pth'
         checkpoint = torch.load(model_path, map_location=self.device)
         
-        vocab_size = len(self.tokenizer.word2idx)
+        vocab_size = len(self.tokenizer)
         embedding_dim = 128
         lstm_units = 64
         dropout_rate = 0.5
         
-        self.model = BiLSTMClassifier(vocab_size, embedding_dim, lstm_units, dropout_rate)
-        self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.model.to(self.device)
-        self.model.eval()
+        model = BiLSTMClassifier(vocab_size, embedding_dim, lstm_units, dropout_rate)
+        model.load_state_dict(checkpoint['model_state_dict'])
+        model.eval()
+        
+        if precision == 'int8':
+            # int8 weights for LSTM/Linear, weight-only int8 rows for the embedding table
+            from torch.ao.quantization import (quantize_dynamic, default_dynamic_qconfig,
+                                               float_qparams_weight_only_qconfig)
+            model = quantize_dynamic(model, {
+                nn.Embedding: float_qparams_weight_only_qconfig,
+                nn.LSTM: default_dynamic_qconfig,
+                nn.Linear: default_dynamic_qconfig
+            }, dtype=torch.qint8)
+        elif precision == 'bf16':
+            model = model.to(torch.bfloat16)
+        
+        return model.to(self.device)
+    
+    def load_onnx_session(self, threads: int = None):
+        """Open lstm_model.onnx with ONNX Runtime's CPU provider"""
+        import onnxruntime as ort
+        
+        onnx_path = self.model_dir / self.ONNX_MODEL_FILE
+        if not onnx_path.exists():
+            raise FileNotFoundError(f"{onnx_path} not found. Run: python export_model.py onnx")
+        
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        return ort.InferenceSession(str(onnx_path), options, providers=['CPUExecutionProvider'])
+    
+    def load_bundle(self):
+        """Memory-map model.bundle (weights + vocabulary, shared across processes)"""
+        from model_bundle import ModelBundle
         
-        print(f"✓ Model loaded successfully")
+        bundle_path = self.model_dir / self.BUNDLE_FILE
+        if not bundle_path.exists():
+            raise FileNotFoundError(f"{bundle_path} not found. Run: python export_model.py bundle")
+        
+        return ModelBundle(bundle_path)
+    
+    def load_numpy_engine(self):
+        """Load the torch-free NumPy engine from model.bundle or lstm_model.npz"""
+        from numpy_engine import NumpyBiLSTM
+        
+        if self.bundle is not None:
+            # Zero-copy: the engine's arrays are views into the bundle's mmap
+            return NumpyBiLSTM(self.bundle.weights('lstm.'), fold_embedding=self.fold_embedding)
+        
+        weights_path = self.model_dir / self.NUMPY_MODEL_FILE
+        if not weights_path.exists():
+            raise FileNotFoundError(f"{weights_path} not found. Run: python export_model.py numpy")
+        
+        return NumpyBiLSTM.load(weights_path, fold_embedding=self.fold_embedding)
+    
+    def check_parity(self, emails: List[Dict] = None) -> Dict[str, Any]:
+        """Compare this detector's scores with the fp32 model on a reference email set (needs torch)"""
+        if emails is None:
+            with open(self.REFERENCE_EMAILS, 'r', encoding='utf-8') as f:
+                emails = json.load(f)
+        
+        candidate = self.predict_batch(emails)
+        
+        # Score the same emails with a full-precision eager PyTorch copy of the model, in this
+        # process: scoring workers hold their own copy of the candidate model
+        current_model, current_backend, current_pool = self.model, self.backend, self.pool
+        try:
+            self.model, self.backend, self.pool = self.load_model('fp32'), 'torch', None
+            reference = self.predict_batch(emails)
+        finally:
+            self.model, self.backend, self.pool = current_model, current_backend, current_pool
+        
+        report = parity_report(reference, candidate)
+        report['precision'] = self.precision
+        report['backend'] = self.backend
+        return report
+    
+    def check_cascade(self, emails: List[Dict] = None) -> Dict[str, Any]:
+        """Compare cascade verdicts with LSTM-only verdicts (and with labels, where emails have them)"""
+        if emails is None:
+            with open(self.REFERENCE_EMAILS, 'r', encoding='utf-8') as f:
+                emails = json.load(f)
+        
+        decided = self.cascade_predictions(emails, self.extract_features_batch(emails))
+        lstm_only = self.predict_batch(emails)
+        cascade = [decision or prediction for decision, prediction in zip(decided, lstm_only)]
+        
+        report = parity_report(lstm_only, cascade)
+        report['band'] = list(self.cascade.band)
+        report['lstm_skipped'] = sum(1 for decision in decided if decision is not None)
+        report['skip_fraction'] = round(report['lstm_skipped'] / len(emails), 4) if emails else 0.0
+        
+        # Emails with a 'label' field (1/true = phishing) give an accuracy for both modes
+        labelled = [(bool(email['label']), ref[0], cand[0])
+                    for email, ref, cand in zip(emails, lstm_only, cascade) if 'label' in email]
+        if labelled:
+            report['labelled_emails'] = len(labelled)
+            report['lstm_accuracy'] = round(sum(1 for y, ref, _ in labelled if y == ref) / len(labelled), 4)
+            report['cascade_accuracy'] = round(sum(1 for y, _, cand in labelled if y == cand) / len(labelled), 4)
+        return report
     
     def convert_frontend_to_model_format(self, email_data: Dict) -> Dict:
         """Convert frontend JSON to model format"""
@@ -245,87 +643,92 @@ class PhishingDetector:
             'sender': email_data.get('sender', '')
         }
     
+    def prepare_text(self, email_data: Dict) -> str:
+        """Build the LSTM input text for an email"""
+        email = self.convert_frontend_to_model_format(email_data)
+        return f"{email['subject']} {email['body']}"
+    
+    def pad_sequences(self, sequences: List[List[int]], max_len: int = None) -> np.ndarray:
+        """Truncate and zero-pad token sequences to max_len"""
+        max_len = max_len or self.max_len
+        padded = np.zeros((len(sequences), max_len), dtype=np.int64)
+        for row, seq in enumerate(sequences):
+            seq = seq[:max_len]
+            padded[row, :len(seq)] = seq
+        return padded
+    
+    def score_padded(self, padded: np.ndarray, lengths: List[int] = None) -> List[float]:
+        """Run one forward pass over a padded batch and return confidences"""
+        if self.backend == 'onnx':
+            output = self.session.run(None, {'input_ids': padded})[0]
+            return output.reshape(-1).tolist()
+        if self.backend == 'numpy':
+            return self.engine(padded, lengths).tolist()
+        
+        import torch
+        
+        with torch.no_grad():
+            X_tensor = torch.from_numpy(padded).to(self.device)
+            output = self.model(X_tensor, lengths)
+            return output.view(-1).float().tolist()
+    
+    def score_sequences(self, sequences: List[List[int]]) -> List[float]:
+        """Score one mini-batch of token sequences according to the padding mode"""
+        lengths = np.array([min(len(seq), self.max_len) for seq in sequences], dtype=np.int64)
+        return self.score_matrix(self.pad_sequences(sequences), lengths)
+    
+    def score_matrix(self, matrix: np.ndarray, lengths: np.ndarray) -> List[float]:
+        """Score one mini-batch of a texts_to_matrix id matrix according to the padding mode"""
+        if self.padding == 'fixed':
+            return self.score_padded(matrix)
+        
+        # Empty emails still get a single <PAD> step, as they would in fixed mode
+        lengths = np.maximum(lengths, 1)
+        width = int(lengths.max())
+        return self.score_padded(np.ascontiguousarray(matrix[:, :width]), lengths.tolist())
+    
     def predict(self, email_data: Dict) -> tuple:
         """Predict if email is phishing"""
-        email = self.convert_frontend_to_model_format(email_data)
+        return self.predict_batch([email_data])[0]
+    
+    def predict_batch(self, emails: List[Dict], batch_size: int = None) -> List[tuple]:
+        """Predict a list of emails with one forward pass per mini-batch"""
+        batch_size = batch_size or self.batch_size
+        texts = [self.prepare_text(email_data) for email_data in emails]
+        matrix, lengths = self.tokenizer.texts_to_matrix(texts, self.max_len)
+        return self.predict_matrix(matrix, lengths, batch_size)
+    
+    def predict_matrix(self, matrix: np.ndarray, lengths: np.ndarray, batch_size: int = None) -> List[tuple]:
+        """Predict texts_to_matrix rows with one forward pass per mini-batch"""
+        batch_size = batch_size or self.batch_size
         
-        # Prepare text for LSTM
-        full_text = f"{email['subject']} {email['body']}"
-        sequences = self.tokenizer.texts_to_sequences([full_text])
+        # Dynamic padding sorts by token count so each batch holds similar lengths
+        order = list(range(len(matrix)))
+        if self.padding == 'dynamic':
+            order.sort(key=lambda i: lengths[i])
         
-        # Pad sequence
-        max_len = 200
-        padded = np.zeros((1, max_len), dtype=np.int64)
-        seq = sequences[0][:max_len]
-        padded[0, :len(seq)] = seq
+        index_batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+        batches = [(matrix[indices], lengths[indices]) for indices in index_batches]
         
-        # Predict
-        with torch.no_grad():
-            X_tensor = torch.LongTensor(padded).to(self.device)
-            output = self.model(X_tensor)
-            confidence = output.item()
+        if self.pool is not None and len(batches) > 1:
+            batch_scores = self.pool.map('score_matrix', batches)
+        else:
+            batch_scores = [self.score_matrix(*batch) for batch in batches]
+        
+        confidences = [0.0] * len(matrix)
+        for indices, scores in zip(index_batches, batch_scores):
+            for i, confidence in zip(indices, scores):
+                confidences[i] = confidence
         
-        is_phishing = confidence >= 0.5
-        return is_phishing, confidence
+        return [(confidence >= 0.5, confidence) for confidence in confidences]
     
-    def analyze_url_risk(self, url: str) -> Dict:
+    def analyze_url_risk(self, url: str, parsed: ParsedUrl = None) -> Dict:
         """Analyze individual URL for risk factors"""
-        risk_factors = []
-        risk_score = 0
-        url_lower = url.lower()
-        
-        # Dangerous file extensions
-        dangerous_extensions = ['.sh', '.exe', '.bat', '.cmd', '.scr', '.vbs', '.ps1']
-        if any(ext in url_lower for ext in dangerous_extensions):
-            risk_factors.append('Dangerous file extension detected')
-            risk_score += 40
-        
-        # IP addresses
-        ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
-        if ip_pattern.search(url):
-            risk_factors.append('Contains IP address')
-            risk_score += 30
-        
-        # Suspicious TLDs
-        suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.online', '.top', '.club']
-        if any(tld in url_lower for tld in suspicious_tlds):
-            risk_factors.append('Suspicious top-level domain')
-            risk_score += 20
-        
-        # Phishing keywords
-        phishing_keywords = ['login', 'verify', 'account', 'secure', 'update', 'confirm', 'suspend']
-        if any(keyword in url_lower for keyword in phishing_keywords):
-            risk_factors.append('Contains phishing keywords')
-            risk_score += 15
-        
-        # URL shorteners
-        shorteners = ['bit.ly', 'tinyurl', 'goo.gl', 't.co', 'ow.ly', 'is.gd']
-        if any(shortener in url_lower for shortener in shorteners):
-            risk_factors.append('URL shortener detected')
-            risk_score += 10
-        
-        # Excessive length
-        if len(url) > 100:
-            risk_factors.append('Unusually long URL')
-            risk_score += 10
-        
-        # Risk level
-        if risk_score >= 50:
-            risk_level = 'CRITICAL'
-        elif risk_score >= 30:
-            risk_level = 'HIGH'
-        elif risk_score >= 15:
-            risk_level = 'MEDIUM'
-        elif risk_score > 0:
-            risk_level = 'LOW'
-        else:
-            risk_level = 'SAFE'
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'risk_factors': risk_factors
-        }
+        return self.url_rules.evaluate_batch([parsed or url], self.url_cache)[0]
+    
+    def analyze_urls(self, urls: List[str]) -> List[Dict]:
+        """Analyze many URLs at once; repeated URLs are parsed and scored once"""
+        return self.url_rules.evaluate_batch(urls, self.url_cache)
     
     def detect_red_flags(self, email_data: Dict, features: Dict, urls_analysis: List[Dict]) -> List[Dict]:
         """Detect all red flags in the email"""
@@ -353,17 +756,18 @@ class PhishingDetector:
                 'description': 'URL contains common phishing terms'
             })
         
-        # Malicious files
-        body = email_data.get('body_full', '')
-        malicious_extensions = ['.sh', '.exe', '.bat', '.scr', '.vbs']
+        # Malicious files (analyze_email passes the hits found by scan_text)
+        malicious_extensions = features.get('malicious_extensions')
+        if malicious_extensions is None:
+            body_hits = self.matcher.scan(email_data.get('body_full', '').lower())
+            malicious_extensions = body_hits.get('malicious_extensions', [])
         for ext in malicious_extensions:
-            if ext in body.lower():
-                red_flags.append({
-                    'category': 'MALWARE',
-                    'severity': 'CRITICAL',
-                    'flag': f'Malicious file extension: {ext}',
-                    'description': f'{ext} files can execute malicious code'
-                })
+            red_flags.append({
+                'category': 'MALWARE',
+                'severity': 'CRITICAL',
+                'flag': f'Malicious file extension: {ext}',
+                'description': f'{ext} files can execute malicious code'
+            })
         
         # Sender-based
         if sender_features.get('sender_domain_mismatch', 0):
@@ -473,28 +877,75 @@ class PhishingDetector:
         
         return recommendations
     
-    def analyze_email(self, email_data: Dict) -> Dict[str, Any]:
-        """Complete analysis of a single email"""
-        
-        # Make prediction
-        is_phishing, confidence = self.predict(email_data)
-        
-        # Extract features
+    def extract_features(self, email_data: Dict) -> Dict:
+        """URL context and URL/text/sender features of one email"""
         email = self.convert_frontend_to_model_format(email_data)
-        url_features = self.feature_extractor.extract_url_features(email['body'])
-        text_features = self.feature_extractor.extract_text_features(email['subject'], email['body'])
-        sender_features = self.feature_extractor.extract_sender_features(email['sender'], email['body'])
+        urls = self.feature_extractor.url_context(email['body'], email_data.get('urls_found', []))
+        text_features, malicious_extensions = self.feature_extractor.scan_text(email['subject'], email['body'])
         
-        features = {
-            'url_features': url_features,
+        return {
+            'urls': urls,
+            'url_features': self.feature_extractor.extract_url_features(email['body'], urls.body_urls),
             'text_features': text_features,
-            'sender_features': sender_features
+            'sender_features': self.feature_extractor.extract_sender_features(email['sender'], email['body'],
+                                                                              urls.body_urls),
+            'malicious_extensions': malicious_extensions
         }
+    
+    def extract_features_batch(self, emails: List[Dict]) -> FeatureBatch:
+        """Features of many emails as columns; per-email dicts come from FeatureBatch.row()"""
+        model_emails = [self.convert_frontend_to_model_format(email_data) for email_data in emails]
+        urls = [self.feature_extractor.url_context(email['body'], email_data.get('urls_found', []))
+                for email, email_data in zip(model_emails, emails)]
+        return self.feature_extractor.extract_batch(model_emails, urls)
+    
+    def cascade_predictions(self, emails: List[Dict], features: FeatureBatch,
+                            predictions: List[tuple] = None) -> List[tuple]:
+        """(is_phishing, confidence, 'cascade') where the linear scorer is sure; None in its band"""
+        from cascade_scorer import feature_columns
+        
+        predictions = list(predictions) if predictions is not None else [None] * len(emails)
+        pending = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if pending:
+            columns = {name: column[pending] for name, column in feature_columns(features, emails).items()}
+            probabilities = self.cascade.probabilities([self.prepare_text(emails[i]) for i in pending], columns)
+            for i, decision in zip(pending, self.cascade.decide(probabilities)):
+                if decision is not None:
+                    predictions[i] = (*decision, 'cascade')
+        return predictions
+    
+    def analyze_email(self, email_data: Dict, prediction: tuple = None, features: Dict = None) -> Dict[str, Any]:
+        """Complete analysis of a single email"""
+        
+        # Make prediction (analyze_batch passes in a batched prediction)
+        cache_key = None
+        if prediction is None:
+            if self.result_cache is not None:
+                cache_key = self.result_key(email_data)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return self.fill_result(cached, email_data)
+            if self.cascade is not None and features is None:
+                batch = self.extract_features_batch([email_data])
+                prediction = self.cascade_predictions([email_data], batch)[0]
+                features = batch.row(0)
+            if prediction is None:
+                prediction = self.predict(email_data)
+        is_phishing, confidence = prediction[:2]
+        scored_by_cascade = len(prediction) > 2 and prediction[2] == 'cascade'
+        
+        # Extract features (the cascade computes them before scoring)
+        if features is None:
+            features = self.extract_features(email_data)
+        urls = features['urls']
+        url_features = features['url_features']
+        text_features = features['text_features']
+        sender_features = features['sender_features']
         
         # Analyze URLs
         urls_analysis = []
-        for url in email_data.get('urls_found', []):
-            url_risk = self.analyze_url_risk(url)
+        url_risks = self.url_rules.evaluate_batch(urls.scraped, self.url_cache, urls.parse)
+        for url, url_risk in zip(urls.scraped, url_risks):
             urls_analysis.append({
                 'url': url,
                 'risk_level': url_risk['risk_level'],
@@ -573,20 +1024,112 @@ class PhishingDetector:
             
             'analysis_metadata': {
                 'analyzed_at': datetime.now().isoformat(),
-                'model_type': 'LSTM (PyTorch)',
+                'model_type': self.CASCADE_MODEL_TYPE if scored_by_cascade else self.MODEL_TYPES[self.backend],
                 'device': str(self.device)
             }
         }
         
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
         return result
     
-    def analyze_batch(self, emails: List[Dict]) -> Dict[str, Any]:
-        """Analyze multiple emails"""
+    def predict_batch_safe(self, emails: List[Dict], batch_size: int = None) -> List[tuple]:
+        """Batched predict that isolates failures to the emails that caused them"""
+        batch_size = batch_size or self.batch_size
+        predictions = []
+        
+        for start in range(0, len(emails), batch_size):
+            chunk = emails[start:start + batch_size]
+            try:
+                predictions.extend(self.predict_batch(chunk, batch_size))
+            except Exception:
+                # Retry one by one so a single bad email does not fail the batch
+                for email in chunk:
+                    try:
+                        predictions.append(self.predict(email))
+                    except Exception as e:
+                        predictions.append(e)
+        
+        return predictions
+    
+    def campaign_predictions(self, emails: List[Dict], pending: List[int], batch_size: int = None) -> tuple:
+        """Cluster emails into campaigns; predictions for the pending ones (None: not scored yet)"""
+        texts = [self.prepare_text(email_data) for email_data in emails]
+        matrix, lengths = self.tokenizer.texts_to_matrix(texts, self.max_len)
+        assignments = self.campaigns.assign(matrix, lengths)
+        
+        # The first pending member of each cluster without a score is scored for the cluster
+        leaders = {}
+        for index in pending:
+            if assignments[index] is not None and assignments[index][0].prediction is None:
+                leaders.setdefault(assignments[index][0].cluster_id, index)
+        leader_rows = list(leaders.values())
+        if leader_rows and self.cascade is not None:
+            # The linear scorer goes first: a confident score settles the whole cluster without the LSTM
+            leader_emails = [emails[index] for index in leader_rows]
+            try:
+                decided = self.cascade_predictions(leader_emails, self.extract_features_batch(leader_emails))
+            except Exception:
+                decided = [None] * len(leader_rows)
+            for index, decision in zip(leader_rows, decided):
+                if decision is not None:
+                    assignments[index][0].prediction = decision
+            leader_rows = [index for index, decision in zip(leader_rows, decided) if decision is None]
+        if leader_rows:
+            try:
+                scored = self.predict_matrix(matrix[leader_rows], lengths[leader_rows], batch_size)
+            except Exception:
+                # Members are then predicted one by one by analyze_chunk
+                scored = []
+            for index, (_, confidence) in zip(leader_rows, scored):
+                assignments[index][0].prediction = (confidence >= 0.5, confidence)
+        
+        predictions = []
+        reused = set()
+        for index in pending:
+            campaign = assignments[index][0] if assignments[index] is not None else None
+            if campaign is None or campaign.prediction is None:
+                predictions.append(None)
+                continue
+            predictions.append(campaign.prediction)
+            if leaders.get(campaign.cluster_id) != index:
+                reused.add(index)
+        
+        campaigns = [{
+            'cluster_id': assignment[0].cluster_id,
+            'cluster_size': assignment[0].size,
+            'similarity': round(assignment[1], 4),
+            'score_reused': index in reused
+        } if assignment is not None else None for index, assignment in enumerate(assignments)]
+        return campaigns, predictions
+    
+    def analyze_chunk(self, emails: List[Dict], batch_size: int = None, predictions: List[tuple] = None) -> List[Dict]:
+        """Analyze emails in this process and return per-email results (FAILED entries on error)"""
         results = []
         
-        for email in emails:
+        # Features of the whole chunk as columns; per-email dicts are only built for result
+        # assembly. If any email breaks the batch path, analyze_email extracts one by one.
+        try:
+            batch = self.extract_features_batch(emails)
+        except Exception:
+            batch = None
+        if self.cascade is not None and batch is not None:
+            predictions = self.cascade_predictions(emails, batch, predictions)
+        
+        if predictions is None:
+            predictions = self.predict_batch_safe(emails, batch_size)
+        else:
+            # Only the emails without a prediction (campaign or cascade score) go through the model
+            missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+            predictions = list(predictions)
+            for i, prediction in zip(missing, self.predict_batch_safe([emails[i] for i in missing], batch_size)):
+                predictions[i] = prediction
+        
+        for i, (email, prediction) in enumerate(zip(emails, predictions)):
             try:
-                result = self.analyze_email(email)
+                if isinstance(prediction, Exception):
+                    raise prediction
+                result = self.analyze_email(email, prediction, batch.row(i) if batch is not None else None)
                 results.append(result)
             except Exception as e:
                 results.append({
@@ -595,6 +1138,76 @@ class PhishingDetector:
                     'status': 'FAILED'
                 })
         
+        return results
+    
+    def analyze_chunk_in_worker(self, emails: List[Dict], batch_size: int = None,
+                                predictions: List[tuple] = None) -> tuple:
+        """analyze_chunk in a scoring worker: (results, URL verdict journal or None for the parent's cache)"""
+        results = self.analyze_chunk(emails, batch_size, predictions)
+        return results, self.url_cache.take_journal() if self.url_cache is not None else None
+    
+    def analyze_batch(self, emails: List[Dict], batch_size: int = None) -> Dict[str, Any]:
+        """Analyze multiple emails"""
+        batch_size = batch_size or self.batch_size
+        
+        # Content seen before is answered from the result cache; of the new content,
+        # only the first copy in the batch is analyzed
+        results = [None] * len(emails)
+        pending = list(range(len(emails)))
+        if self.result_cache is not None:
+            keys = [self.result_key(email) for email in emails]
+            owners = {}
+            pending = []
+            for index, key in enumerate(keys):
+                if key in owners:
+                    continue
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    results[index] = self.fill_result(cached, emails[index])
+                else:
+                    owners[key] = index
+                    pending.append(index)
+        to_analyze = [emails[index] for index in pending]
+        
+        # Near-duplicates of a scored campaign reuse its model score; features stay per email
+        campaigns = predictions = None
+        if self.campaigns is not None:
+            campaigns, predictions = self.campaign_predictions(emails, pending, batch_size)
+        
+        if self.pool is not None and len(to_analyze) > batch_size:
+            # Whole chunks (model + features) run in the workers, results come back in order
+            chunks = [(to_analyze[start:start + batch_size], batch_size,
+                       predictions[start:start + batch_size] if predictions is not None else None)
+                      for start in range(0, len(to_analyze), batch_size)]
+            analyzed = []
+            for chunk_results, url_journal in self.pool.map('analyze_chunk_in_worker', chunks):
+                analyzed.extend(chunk_results)
+                # Workers analyze URLs against their own copy of the cache
+                if self.url_cache is not None and url_journal is not None:
+                    self.url_cache.merge(url_journal)
+        else:
+            analyzed = self.analyze_chunk(to_analyze, batch_size, predictions)
+        for index, result in zip(pending, analyzed):
+            results[index] = result
+        
+        if self.result_cache is not None:
+            for index in pending:
+                if 'error' not in results[index]:
+                    self.result_cache.put(keys[index], results[index])
+            # Later copies of content analyzed in this batch
+            for index, key in enumerate(keys):
+                if results[index] is None:
+                    owner = results[owners[key]]
+                    cached = self.result_cache.get(key) if 'error' not in owner else None
+                    results[index] = self.fill_result(cached if cached is not None else copy.deepcopy(owner),
+                                                      emails[index])
+        
+        # Cluster ids are added after caching: they depend on what was seen before, not on the email
+        if campaigns is not None:
+            for result, campaign in zip(results, campaigns):
+                if 'error' not in result:
+                    result['campaign'] = campaign
+        
         # Calculate statistics
         successful = [r for r in results if 'error' not in r]
         phishing_count = sum(1 for r in successful if r['prediction']['is_phishing'])
@@ -614,6 +1227,13 @@ class PhishingDetector:
                 'SAFE': sum(1 for r in successful if r['prediction'].get('threat_level') == 'SAFE')
             }
         }
+        if self.cascade is not None:
+            skipped = sum(1 for r in successful if r['analysis_metadata']['model_type'] == self.CASCADE_MODEL_TYPE)
+            batch_summary['cascade'] = {
+                'band': list(self.cascade.band),
+                'lstm_skipped': skipped,
+                'skip_fraction': round(skipped / len(successful), 4) if successful else 0.0
+            }
         
         return {
             'batch_summary': batch_summary,
@@ -622,6 +1242,14 @@ class PhishingDetector:
         }
 
 
+def __getattr__(name):
+    # BiLSTMClassifier lives in lstm_model.py so that importing this module stays torch-free
+    if name == 'BiLSTMClassifier':
+        from lstm_model import BiLSTMClassifier
+        return BiLSTMClassifier
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # ==================== MAIN FUNCTION ====================
 
 def main():
@@ -631,7 +1259,36 @@ def main():
     parser.add_argument('--input', required=True, help='Input JSON file with emails')
     parser.add_argument('--output', default='analysis_results.json', help='Output JSON file')
     parser.add_argument('--pretty', action='store_true', help='Pretty print JSON')
+    parser.add_argument('--model-dir', default='models', help='Directory with model files')
+    parser.add_argument('--batch-size', type=int, default=64, help='Emails per model forward pass')
+    parser.add_argument('--padding', choices=PhishingDetector.PADDING_MODES, default='fixed',
+                        help='fixed: pad to 200 tokens; dynamic: length buckets + packed LSTM')
+    parser.add_argument('--precision', choices=PhishingDetector.PRECISIONS, default='fp32',
+                        help='Model weight precision (int8/bf16 are CPU inference modes)')
+    parser.add_argument('--backend', choices=PhishingDetector.BACKENDS, default='torch',
+                        help='Inference backend (onnx/numpy need python export_model.py onnx/numpy)')
+    parser.add_argument('--fold-embedding', action='store_true',
+                        help='numpy backend: turn the first LSTM input GEMM into a table lookup')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scoring worker processes sharing one read-only model copy')
+    parser.add_argument('--bundle', action='store_true',
+                        help='Load the tokenizer (and numpy weights) from models/model.bundle via mmap')
+    parser.add_argument('--url-cache', default=None,
+                        help='JSON file that keeps URL risk verdicts across runs')
+    parser.add_argument('--result-cache', default=None,
+                        help='Directory that keeps analysis results of repeated email content across runs')
+    parser.add_argument('--campaign-threshold', type=float, default=None,
+                        help='Reuse the model score of near-duplicate emails at this MinHash similarity (e.g. 0.9)')
+    parser.add_argument('--cascade', type=float, nargs=2, metavar=('LOW', 'HIGH'), default=None,
+                        help='Let the TF-IDF cascade scorer decide emails scoring <= LOW or >= HIGH '
+                             '(needs python cascade_scorer.py)')
+    parser.add_argument('--check-cascade', action='store_true',
+                        help='Report LSTM skip fraction and verdict agreement of --cascade vs LSTM-only')
+    parser.add_argument('--check-parity', action='store_true',
+                        help='Report agreement with the fp32 PyTorch model on the input emails')
     args = parser.parse_args()
+    if args.check_cascade and args.cascade is None:
+        parser.error('--check-cascade needs --cascade LOW HIGH')
     
     print("="*80)
     print("PHISHING EMAIL DETECTION PIPELINE")
@@ -650,14 +1307,36 @@ def main():
     # Initialize detector
     print("\nInitializing detector...")
     try:
-        detector = PhishingDetector()
+        detector = PhishingDetector(model_dir=args.model_dir, batch_size=args.batch_size, padding=args.padding,
+                                    precision=args.precision, backend=args.backend,
+                                    fold_embedding=args.fold_embedding, workers=args.workers,
+                                    use_bundle=args.bundle, url_cache_path=args.url_cache,
+                                    result_cache_path=args.result_cache,
+                                    campaign_threshold=args.campaign_threshold, cascade_band=args.cascade)
     except Exception as e:
         print(f"ERROR: Could not load model: {e}")
         sys.exit(1)
     
+    if args.check_parity:
+        report = detector.check_parity(emails)
+        print(f"\nParity vs fp32 PyTorch ({report['backend']}, {report['precision']}):")
+        print(f"  Verdict agreement:    {report['verdict_agreement'] * 100:.2f}%")
+        print(f"  Max confidence delta: {report['max_confidence_delta']:.6f}")
+    
+    if args.check_cascade:
+        report = detector.check_cascade(emails)
+        print(f"\nCascade vs LSTM-only (band {report['band'][0]}-{report['band'][1]}):")
+        print(f"  LSTM skipped:         {report['lstm_skipped']} of {report['emails_compared']} "
+              f"({report['skip_fraction'] * 100:.1f}%)")
+        print(f"  Verdict agreement:    {report['verdict_agreement'] * 100:.2f}%")
+        if 'labelled_emails' in report:
+            print(f"  Accuracy ({report['labelled_emails']} labelled): LSTM {report['lstm_accuracy'] * 100:.2f}%, "
+                  f"cascade {report['cascade_accuracy'] * 100:.2f}%")
+    
     # Analyze emails
     print(f"\nAnalyzing {len(emails)} email(s)...\n")
     results = detector.analyze_batch(emails)
+    detector.close()
     
     # Save results
     with open(args.output, 'w', encoding='utf-8') as f:
@@ -675,6 +1354,21 @@ def main():
     print(f"  Phishing detected: {results['batch_summary']['phishing_detected']}")
     print(f"  Legitimate:        {results['batch_summary']['legitimate']}")
     print(f"  Phishing rate:     {results['batch_summary']['phishing_percentage']}%")
+    if detector.result_cache is not None:
+        cache_stats = detector.result_cache.stats()
+        print(f"  Result cache:      {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+              f"{cache_stats['misses']} misses")
+    if 'cascade' in results['batch_summary']:
+        cascade = results['batch_summary']['cascade']
+        print(f"  LSTM skipped:      {cascade['lstm_skipped']} ({cascade['skip_fraction'] * 100:.1f}%, cascade)")
+    if detector.campaigns is not None:
+        campaigns = [r['campaign'] for r in results['results'] if r.get('campaign')]
+        print(f"  Campaign clusters: {len({c['cluster_id'] for c in campaigns})} "
+              f"({sum(c['score_reused'] for c in campaigns)} model scores reused)")
+    if detector.url_cache is not None:
+        cache_stats = detector.url_cache.stats()
+        print(f"  URL verdict cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['size']} cached)")
     
     if results['batch_summary']['phishing_detected'] > 0:
         print(f"\n  Threat Distribution:")
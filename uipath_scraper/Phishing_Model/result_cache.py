@@ -0,0 +1,97 @@
+"""
+Phishing Email Detection - Analysis Result Cache
+Content-addressed cache of analyze_email results: in-memory LRU in front of an on-disk store
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResultCache:
+    """Analysis results keyed by a hash of the email content, scoped to one model/rules namespace"""
+
+    def __init__(self, namespace: str, maxsize: int = 4096, path: Optional[Path] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.namespace = namespace
+        self.maxsize = maxsize
+        # One subdirectory per namespace: results of another model are never read,
+        # and stale namespaces can be deleted as a whole
+        self.directory = Path(path) / namespace if path is not None else None
+        self.entries = OrderedDict()  # key -> result as JSON text (decoding it yields a fresh copy)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, content: Any) -> str:
+        """SHA-256 of the namespace and the canonical JSON form of the content"""
+        canonical = json.dumps([self.namespace, content], ensure_ascii=False, separators=(',', ':'),
+                               default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def file_for(self, key: str) -> Path:
+        """On-disk location of one result (fanned out by the first two hex digits)"""
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Fresh copy of a cached result from memory, then disk; None on a miss"""
+        text = self.entries.get(key)
+        if text is not None:
+            self.memory_hits += 1
+            self.entries.move_to_end(key)
+            return json.loads(text)
+
+        if self.directory is not None:
+            try:
+                text = self.file_for(key).read_text(encoding='utf-8')
+                result = json.loads(text)
+            except (OSError, ValueError):
+                result = None
+            if result is not None:
+                self.disk_hits += 1
+                self.remember(key, text)
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict):
+        """Store a result in memory and, with a path, on disk"""
+        text = json.dumps(result, ensure_ascii=False)
+        self.remember(key, text)
+        if self.directory is not None:
+            file_path = self.file_for(key)
+            try:
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(text, encoding='utf-8')
+                os.replace(tmp_path, file_path)
+            except OSError as e:
+                print(f"WARNING: Could not write result cache entry {file_path}: {e}")
+
+    def remember(self, key: str, text: str):
+        """Insert into the memory tier, evicting the least recently used entry when full"""
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier and memory occupancy"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'namespace': self.namespace
+        }
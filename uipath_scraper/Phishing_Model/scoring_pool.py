@@ -0,0 +1,68 @@
+"""
+Phishing Email Detection - Multi-process Scoring Pool
+Spreads batches of work for one PhishingDetector across N worker processes
+"""
+import multiprocessing
+import os
+from typing import Any, Dict, List
+
+
+# Detector used by the worker processes. On fork it is the parent's instance,
+# inherited copy-on-write, so the model weights exist once in physical memory.
+_worker_detector = None
+
+
+def _init_worker(detector_kwargs: Dict[str, Any], threads: int):
+    """Pin per-worker thread counts and make sure the worker has a detector"""
+    global _worker_detector
+
+    if _worker_detector is None:
+        # spawn start method (Windows): nothing is inherited, load a private copy
+        from phishing_detector import PhishingDetector
+        _worker_detector = PhishingDetector(**detector_kwargs)
+
+    _worker_detector.pool = None
+    # URL verdicts found here are sent back with each chunk and merged into the parent's cache
+    if _worker_detector.url_cache is not None:
+        _worker_detector.url_cache.start_journal()
+    if _worker_detector.backend == 'torch':
+        import torch
+        torch.set_num_threads(threads)
+    elif _worker_detector.backend == 'onnx':
+        # ONNX Runtime's thread pool does not survive fork, reopen the session
+        _worker_detector.session = _worker_detector.load_onnx_session(threads)
+
+
+def _run_in_worker(task: tuple) -> Any:
+    """Call one detector method on one chunk of work"""
+    method, args = task
+    return getattr(_worker_detector, method)(*args)
+
+
+class ScoringPool:
+    """Process pool that runs PhishingDetector methods on chunks, in input order"""
+
+    def __init__(self, detector, workers: int, detector_kwargs: Dict[str, Any]):
+        global _worker_detector
+
+        self.workers = workers
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            _worker_detector = detector
+        else:
+            context = multiprocessing.get_context('spawn')
+
+        self.pool = context.Pool(workers, initializer=_init_worker,
+                                 initargs=(detector_kwargs, self.threads_per_worker))
+        _worker_detector = None
+
+    def map(self, method: str, chunks: List[tuple]) -> List[Any]:
+        """Run detector.method(*chunk) for every chunk and return results in order"""
+        return self.pool.map(_run_in_worker, [(method, chunk) for chunk in chunks])
+
+    def close(self):
+        """Stop the worker processes"""
+        self.pool.terminate()
+        self.pool.join()
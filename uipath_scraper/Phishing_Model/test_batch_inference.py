@@ -0,0 +1,85 @@
+"""
+Behaviour checks for batched inference (PhishingDetector.predict_batch / analyze_batch)
+Run: python -m pytest test_batch_inference.py -q
+Detector checks need the trained weights; PHISHING_MODEL_DIR points at another models folder.
+"""
+
+import copy
+import json
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from phishing_detector import PhishingDetector, SimpleTokenizer, TokenizerUnpickler
+
+MODEL_DIR = Path(os.environ.get('PHISHING_MODEL_DIR', Path(__file__).parent / 'models'))
+SAMPLE_EMAILS = Path(__file__).parent / 'examples' / 'sample_emails.json'
+
+needs_model = pytest.mark.skipif(not (MODEL_DIR / 'lstm_model.pth').exists(),
+                                 reason=f"no lstm_model.pth in {MODEL_DIR}")
+
+
+def test_tokenizer_loads_whatever_main_defines(monkeypatch):
+    # tokenizer.pkl refers to __main__.SimpleTokenizer; the running __main__ may define another one or none
+    monkeypatch.setitem(sys.modules, '__main__', types.ModuleType('__main__'))
+    with open(MODEL_DIR / 'tokenizer.pkl', 'rb') as f:
+        tokenizer = TokenizerUnpickler(f).load()
+    assert type(tokenizer) is SimpleTokenizer and len(tokenizer) > 2
+
+    class SimpleTokenizerOfAnotherScript:
+        pass
+    monkeypatch.setattr(sys.modules['__main__'], 'SimpleTokenizer', SimpleTokenizerOfAnotherScript, raising=False)
+    with open(MODEL_DIR / 'tokenizer.pkl', 'rb') as f:
+        assert type(TokenizerUnpickler(f).load()) is SimpleTokenizer
+
+
+@pytest.fixture(scope='module')
+def detector():
+    detector = PhishingDetector(model_dir=MODEL_DIR, result_cache_size=0)
+    yield detector
+    detector.close()
+
+
+@pytest.fixture(scope='module')
+def emails():
+    with open(SAMPLE_EMAILS, 'r', encoding='utf-8') as f:
+        emails = json.load(f)
+    # Lengths on both sides of max_len, so padding and truncation are both exercised
+    return emails + [{**emails[0], 'email_id': 'long', 'body_full': emails[0]['body_full'] * 200},
+                     {**emails[0], 'email_id': 'empty', 'subject': '', 'body_full': ''}]
+
+
+def without_timestamps(result):
+    result = copy.deepcopy(result)
+    result.get('analysis_metadata', {}).pop('analyzed_at', None)
+    return result
+
+
+@needs_model
+@pytest.mark.parametrize('batch_size', [1, 3, 64])
+def test_batched_scores_match_single_scores(detector, emails, batch_size):
+    single = [detector.predict(email) for email in emails]
+    batched = detector.predict_batch(emails, batch_size=batch_size)
+    assert [is_phishing for is_phishing, _ in batched] == [is_phishing for is_phishing, _ in single]
+    assert [confidence for _, confidence in batched] == pytest.approx([confidence for _, confidence in single],
+                                                                       abs=1e-5)
+
+
+@needs_model
+def test_analyze_batch_matches_analyze_email(detector, emails):
+    batch = detector.analyze_batch(copy.deepcopy(emails), batch_size=4)
+    single = [detector.analyze_email(email) for email in copy.deepcopy(emails)]
+    assert [without_timestamps(result) for result in batch['results']] == \
+           [without_timestamps(result) for result in single]
+    assert batch['batch_summary']['total_emails'] == len(emails)
+
+
+@needs_model
+def test_a_broken_email_fails_alone(detector, emails):
+    broken = {**emails[0], 'email_id': 'broken', 'urls_found': 5}
+    results = detector.analyze_batch([emails[0], broken, emails[1]])['results']
+    assert [result['email_id'] for result in results] == [emails[0]['email_id'], 'broken', emails[1]['email_id']]
+    assert 'error' in results[1] and 'error' not in results[0] and 'error' not in results[2]
@@ -0,0 +1,69 @@
+"""
+Behaviour checks for the offline public-suffix resolver (domain_resolver.py)
+Run: python -m pytest test_domain_resolver.py -q
+"""
+
+import pytest
+
+from domain_resolver import DomainParts, PublicSuffixResolver, SUFFIX_LIST_FILE, default_resolver, host_of
+
+URLS = [
+    'www.city.kawasaki.jp', 'a.b.ck', 'www.ck', 'xn--85x722f.xn--55qx5d.cn', 'foo.bar.appspot.com',
+    'EXAMPLE.COM.', 'http://[::1]:80/x', '1.2.3.4', '999.1.1.1', '1.2.3.4.evil.com', 'localhost',
+    'a.example.co.uk', 'https://user:pw@Sub.Example.COM:8443/p?q#f', '//cdn.example.org/x', 'example。com',
+    'a.b.c.d.e.gov.uk', 'mail.google.com/', 'http://xn--mller-kva.de/', 'müller.de', 'foo.s3.amazonaws.com',
+    'ftp://x.y.z.com.au', 'http://paypal-verify.tk/secure/verify.php?id=1', 'not a url', '',
+]
+
+
+@pytest.mark.parametrize('url, parts', [
+    ('https://a.example.co.uk/path', ('a', 'example', 'co.uk')),
+    ('https://user:pw@Sub.Example.COM:8443/p?q#f', ('Sub', 'Example', 'COM')),
+    ('EXAMPLE.COM.', ('', 'EXAMPLE', 'COM')),
+    ('example。com', ('', 'example', 'com')),
+    # '*.kawasaki.jp' with the exception '!city.kawasaki.jp'
+    ('www.city.kawasaki.jp', ('www', 'city', 'kawasaki.jp')),
+    ('a.b.kawasaki.jp', ('', 'a', 'b.kawasaki.jp')),
+    ('xn--85x722f.xn--55qx5d.cn', ('', 'xn--85x722f', 'xn--55qx5d.cn')),
+    # Private-section suffixes (appspot.com) are not used, like tldextract's default
+    ('foo.bar.appspot.com', ('foo.bar', 'appspot', 'com')),
+    ('http://192.168.1.1/x', ('', '192.168.1.1', '')),
+    ('http://[2001:db8::1]/a', ('', '[2001:db8::1]', '')),
+    ('1.2.3.4.evil.com', ('1.2.3.4', 'evil', 'com')),
+    ('999.1.1.1', ('999.1.1', '1', '')),
+    ('localhost', ('', 'localhost', '')),
+])
+def test_extract(url, parts):
+    assert default_resolver().extract(url) == DomainParts(*parts)
+
+
+def test_registered_domain():
+    assert default_resolver().registered_domain('https://login.paypal.co.uk/x') == 'paypal.co.uk'
+
+
+@pytest.mark.parametrize('url, host', [
+    ('https://user@host.com:80/a', 'host.com'),
+    ('host.com/a?b#c', 'host.com'),
+    ('//host.com', 'host.com'),
+    ('http://[::1]:8080/', '[::1]'),
+    ('mailto:someone@host.com', 'host.com'),
+])
+def test_host_of(url, host):
+    assert host_of(url) == host
+
+
+def test_split_is_memoized():
+    resolver = PublicSuffixResolver(cache_size=8)
+    resolver.extract('https://a.example.com/1')
+    resolver.extract('https://a.example.com/2')
+    assert resolver.split_host.cache_info().hits == 1
+
+
+def test_same_results_as_tldextract_on_the_bundled_list(tmp_path):
+    tldextract = pytest.importorskip('tldextract')
+    reference = tldextract.TLDExtract(cache_dir=str(tmp_path), suffix_list_urls=[SUFFIX_LIST_FILE.as_uri()],
+                                      fallback_to_snapshot=False)
+    resolver = default_resolver()
+    for url in URLS:
+        expected = reference(url)
+        assert resolver.extract(url) == (expected.subdomain, expected.domain, expected.suffix), url
@@ -0,0 +1,118 @@
+"""
+Behaviour checks for the analysis result cache (result_cache.py and its use in PhishingDetector)
+Run: python -m pytest test_result_cache.py -q
+Detector checks need the trained weights; PHISHING_MODEL_DIR points at another models folder.
+"""
+
+import copy
+import os
+from pathlib import Path
+
+import pytest
+
+from result_cache import ResultCache
+
+MODEL_DIR = Path(os.environ.get('PHISHING_MODEL_DIR', Path(__file__).parent / 'models'))
+
+needs_model = pytest.mark.skipif(not (MODEL_DIR / 'lstm_model.pth').exists() or
+                                 not (MODEL_DIR / 'cascade_scorer.npz').exists(),
+                                 reason=f"no lstm_model.pth / cascade_scorer.npz in {MODEL_DIR}")
+
+EMAIL = {
+    'email_id': 'A1',
+    'sender': 'security@paypal-verify.tk',
+    'sender_domain': 'paypal-verify.tk',
+    'subject': 'URGENT: Your Account Will Be Suspended',
+    'body_full': 'Verify your identity immediately: http://paypal-verify.tk/secure/verify.php?id=1',
+    'date_received': '2025-11-07 10:30:00',
+    'urls_found': ['http://paypal-verify.tk/secure/verify.php?id=1'],
+    'url_count': 1,
+    'num_attachments': 0
+}
+
+
+def other_email(**fields):
+    """EMAIL with another id and the given fields replaced"""
+    return {**copy.deepcopy(EMAIL), 'email_id': 'B2', **fields}
+
+
+# ==================== ResultCache ====================
+
+def test_get_returns_a_fresh_copy():
+    cache = ResultCache('ns')
+    cache.put('k', {'prediction': {'confidence': 0.9}})
+    cache.get('k')['prediction']['confidence'] = 0.1
+    assert cache.get('k') == {'prediction': {'confidence': 0.9}}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache('ns', maxsize=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    cache.get('a')
+    cache.put('c', {'n': 3})
+    assert set(cache.entries) == {'a', 'c'}
+
+
+def test_disk_tier_is_scoped_to_its_namespace(tmp_path):
+    ResultCache('v1', path=tmp_path).put('k', {'n': 1})
+    assert ResultCache('v1', path=tmp_path).get('k') == {'n': 1}
+    assert ResultCache('v2', path=tmp_path).get('k') is None
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = ResultCache('ns', path=tmp_path)
+    cache.file_for('k').parent.mkdir(parents=True)
+    cache.file_for('k').write_text('{"cut off', encoding='utf-8')
+    assert cache.get('k') is None
+    assert cache.stats()['misses'] == 1
+
+
+# ==================== PhishingDetector ====================
+
+@pytest.fixture(scope='module')
+def detectors():
+    from phishing_detector import PhishingDetector
+    cached = PhishingDetector(model_dir=MODEL_DIR, cascade_band=(0.5, 0.5))
+    plain = PhishingDetector(model_dir=MODEL_DIR, cascade_band=(0.5, 0.5), result_cache_size=0)
+    return cached, plain
+
+
+def comparable(result):
+    """A result without the fields that differ between two runs"""
+    result = copy.deepcopy(result)
+    result.get('analysis_metadata', {}).pop('analyzed_at', None)
+    return result
+
+
+@needs_model
+def test_key_covers_every_field_the_analysis_reads(detectors):
+    detector, _ = detectors
+    key = detector.result_key(EMAIL)
+    assert detector.result_key(other_email(sender_domain='other.com', date_received='2026-01-01')) == key
+    for fields in ({'subject': 'Hello'}, {'body_full': 'Hello'}, {'sender': 'a@b.com'},
+                   {'urls_found': []}, {'num_attachments': 3}):
+        assert detector.result_key(other_email(**fields)) != key, fields
+
+
+@needs_model
+def test_reused_results_match_fresh_analysis(detectors):
+    detector, plain = detectors
+    detector.result_cache.entries.clear()
+    emails = [EMAIL, other_email(num_attachments=20), other_email(email_id='C3', sender_domain='x.tk',
+                                                                 subject=EMAIL['subject'], date_received='2026-01-01')]
+    # First run: the in-batch duplicate (C3) reuses A1's result; second run: every result comes from the cache
+    for _ in range(2):
+        cached = detector.analyze_batch(copy.deepcopy(emails))['results']
+        fresh = plain.analyze_batch(copy.deepcopy(emails))['results']
+        assert [comparable(result) for result in cached] == [comparable(result) for result in fresh]
+    assert cached[0] is not cached[2]
+    assert cached[2]['email_id'] == 'C3' and cached[2]['sender_domain'] == 'x.tk'
+
+
+@needs_model
+def test_cached_result_is_not_shared_with_the_caller(detectors):
+    detector, _ = detectors
+    first = detector.analyze_email(EMAIL)
+    first['prediction']['confidence'] = -1
+    assert detector.analyze_email(EMAIL)['prediction']['confidence'] != -1
@@ -0,0 +1,63 @@
+"""
+Behaviour checks for the batch tokenizer (SimpleTokenizer.texts_to_matrix in phishing_detector.py)
+Run: python -m pytest test_tokenizer.py -q
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from phishing_detector import SimpleTokenizer
+
+
+@pytest.fixture(scope='module')
+def tokenizer():
+    tokenizer = SimpleTokenizer(vocab_size=50)
+    tokenizer.fit_on_texts(['verify your account now', 'Account SUSPENDED click here', 'meeting notes attached'])
+    return tokenizer
+
+
+def padded_sequences(tokenizer, texts, max_len):
+    """The reference path: texts_to_sequences, truncated and zero-padded"""
+    matrix = np.zeros((len(texts), max_len), dtype=np.int64)
+    for row, sequence in enumerate(tokenizer.texts_to_sequences(texts)):
+        sequence = sequence[:max_len]
+        matrix[row, :len(sequence)] = sequence
+    return matrix
+
+
+TEXTS = [
+    '', '   ', 'verify', 'Verify YOUR account   now!', 'a b c d e f g h', '  leading and trailing  ',
+    'tabs\tand\nnewlines\r\nand\x0bvertical\x0cfeed', 'unicode em nbsp　ideographic\x1cfs',
+    'İstanbul ÀCCOUNT ǅungla ß', None, 12345, 'exactly five words here now', 'exactly five words here now   ',
+]
+
+
+@pytest.mark.parametrize('max_len', [1, 3, 5, 8, 200])
+def test_matrix_matches_padded_sequences(tokenizer, max_len):
+    matrix, lengths = tokenizer.texts_to_matrix(TEXTS, max_len)
+    assert matrix.dtype == np.int64 and matrix.shape == (len(TEXTS), max_len)
+    np.testing.assert_array_equal(matrix, padded_sequences(tokenizer, TEXTS, max_len))
+    assert lengths.tolist() == [min(len(str(text).split()), max_len) for text in TEXTS]
+
+
+def test_matrix_matches_padded_sequences_on_random_texts(tokenizer):
+    rng = random.Random(0)
+    words = ['verify', 'ACCOUNT', 'now', 'x', 'ünï', '\t', '\n', ' ', ' ', 'click', 'here']
+    texts = [''.join(rng.choice(words) + rng.choice(['', ' ']) for _ in range(rng.randint(0, 40)))
+             for _ in range(300)]
+    for max_len in (1, 7, 16):
+        matrix, _ = tokenizer.texts_to_matrix(texts, max_len)
+        np.testing.assert_array_equal(matrix, padded_sequences(tokenizer, texts, max_len))
+
+
+def test_leading_words_stops_after_max_len():
+    assert SimpleTokenizer.leading_words('One two  THREE four', 3) == ['one', 'two', 'three']
+    assert SimpleTokenizer.leading_words('one two   ', 2) == ['one', 'two']
+    assert SimpleTokenizer.leading_words('', 4) == []
+
+
+def test_empty_batch(tokenizer):
+    matrix, lengths = tokenizer.texts_to_matrix([], 10)
+    assert matrix.shape == (0, 10) and lengths.shape == (0,)
@@ -0,0 +1,95 @@
+"""
+Behaviour checks for the URL risk rule engine (url_rules.py, url_context.py)
+Run: python -m pytest test_url_rules.py -q
+"""
+
+import pytest
+
+from pattern_matcher import MultiPatternMatcher
+from url_cache import UrlVerdictCache
+from url_context import UrlContext, parse_url
+from url_rules import UrlRuleEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return UrlRuleEngine(MultiPatternMatcher(UrlRuleEngine.PATTERN_LISTS))
+
+
+def fired(engine, url):
+    """Names of the rules that fire for a URL"""
+    return {rule for rule, hit in engine.matches(parse_url(url, engine.matcher)).items() if hit}
+
+
+@pytest.mark.parametrize('url, rules', [
+    ('https://www.example.com/about', set()),
+    # IP rule: only when the host itself is an address literal
+    ('http://192.168.1.1/x', {'ip_host'}),
+    ('http://[2001:db8::1]/a', {'ip_host'}),
+    ('http://user@10.0.0.1:8080/', {'ip_host'}),
+    ('http://1.2.3.4.evil.com/', set()),
+    ('http://example.com/?next=10.0.0.1', set()),
+    # Extension rule: last extension of the final path segment
+    ('http://example.com/run.SH', {'dangerous_extension'}),
+    ('http://example.com/script.sh.txt', set()),
+    ('http://example.com/a.exe/readme', set()),
+    ('http://example.com/page?file=x.exe', set()),
+    ('http://example.com/setup.tar.exe', {'dangerous_extension'}),
+    # TLD rule: last host label, never for IP hosts
+    ('https://shop.tk/', {'suspicious_tld'}),
+    ('https://tk.example.com/', set()),
+    ('https://user:pw@evil.ml:8080/x', {'suspicious_tld'}),
+    # Shortener rule: registered domain, whatever the subdomain
+    ('https://bit.ly/x', {'shortener'}),
+    ('https://www.bit.ly/x', {'shortener'}),
+    ('https://notbit.ly/x', set()),
+    ('https://bit.ly.example.com/x', set()),
+    ('https://example.com/verify-account', {'phishing_keywords'}),
+    ('https://example.com/' + 'a' * 100, {'long_url'}),
+])
+def test_rules(engine, url, rules):
+    assert fired(engine, url) == rules
+
+
+def test_score_and_level(engine):
+    verdict = engine.evaluate(parse_url('http://paypal-verify.tk/secure/login.php', engine.matcher))
+    assert verdict == {'risk_level': 'HIGH', 'risk_score': 35,
+                       'risk_factors': ['Suspicious top-level domain', 'Contains phishing keywords']}
+    verdict = engine.evaluate(parse_url('http://10.0.0.1/update.exe', engine.matcher))
+    assert verdict['risk_level'] == 'CRITICAL' and verdict['risk_score'] == 85
+    assert engine.evaluate(parse_url('https://example.com/', engine.matcher))['risk_level'] == 'SAFE'
+
+
+def test_batch_scores_each_distinct_url_once(engine):
+    parsed = []
+    def parse(url):
+        parsed.append(url)
+        return parse_url(url, engine.matcher)
+    urls = ['http://a.tk/', 'http://b.com/', 'http://a.tk/']
+    verdicts = engine.evaluate_batch(urls, parse=parse)
+    assert parsed == ['http://a.tk/', 'http://b.com/']
+    assert verdicts[0] == verdicts[2] and verdicts[0] is not verdicts[2]
+    verdicts[0]['risk_factors'].append('changed')
+    assert verdicts[2]['risk_factors'] == ['Suspicious top-level domain']
+
+
+def test_batch_reads_and_fills_the_verdict_cache(engine):
+    cache = UrlVerdictCache(engine.version)
+    first = engine.evaluate_batch(['http://a.tk/', 'http://b.com/'], cache=cache)
+    second = engine.evaluate_batch(['http://a.tk/'], cache=cache,
+                                   parse=lambda url: pytest.fail(f"{url} parsed again"))
+    assert second == first[:1]
+
+
+def test_scraped_urls_are_parsed_once_per_email(engine):
+    context = UrlContext('Click http://a.tk/login now', ['http://a.tk/login'], engine.matcher)
+    assert context.parse('http://a.tk/login') is context.parse('http://a.tk/login')
+
+
+def test_version_identifies_the_rule_tables():
+    matcher = MultiPatternMatcher(UrlRuleEngine.PATTERN_LISTS)
+    assert UrlRuleEngine(matcher).version == UrlRuleEngine(matcher).version
+
+    class MoreTlds(UrlRuleEngine):
+        SUSPICIOUS_TLDS = UrlRuleEngine.SUSPICIOUS_TLDS | {'zip'}
+    assert MoreTlds(matcher).version != UrlRuleEngine(matcher).version
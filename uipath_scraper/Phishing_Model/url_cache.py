@@ -0,0 +1,118 @@
+"""
+Phishing Email Detection - URL Verdict Cache
+Bounded LRU of URL risk verdicts shared across emails, optionally persisted to disk
+"""
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class UrlVerdictCache:
+    """LRU of UrlRuleEngine verdicts keyed by URL, valid for one rule-set version"""
+
+    def __init__(self, rule_version: str, maxsize: int = 65536, path: Optional[Path] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.rule_version = rule_version
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        self.verdicts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Verdicts put since the last take_journal(); only kept in scoring workers (see start_journal)
+        self.journal = None
+        if self.path is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self.verdicts)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Copy of the cached verdict for a URL, or None (counted as a miss)"""
+        verdict = self.verdicts.get(url)
+        if verdict is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.verdicts.move_to_end(url)
+        return dict(verdict, risk_factors=list(verdict['risk_factors']))
+
+    def put(self, url: str, verdict: Dict):
+        """Store a verdict, evicting the least recently used one when full"""
+        self.verdicts[url] = dict(verdict, risk_factors=list(verdict['risk_factors']))
+        self.verdicts.move_to_end(url)
+        if self.journal is not None:
+            self.journal[url] = self.verdicts[url]
+        if len(self.verdicts) > self.maxsize:
+            self.verdicts.popitem(last=False)
+
+    def clear(self):
+        """Drop every verdict (counters are kept)"""
+        self.verdicts.clear()
+
+    def start_journal(self):
+        """Record verdicts put from now on and count hits/misses from zero (in a scoring worker)"""
+        self.journal = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def take_journal(self) -> Dict[str, Any]:
+        """Verdicts put and lookups counted since the previous call, for merge() in the parent"""
+        journal = {'verdicts': list(self.journal.items()), 'hits': self.hits, 'misses': self.misses}
+        self.start_journal()
+        return journal
+
+    def merge(self, journal: Dict[str, Any]):
+        """Add the verdicts and counters a scoring worker took with take_journal()"""
+        for url, verdict in journal['verdicts']:
+            self.put(url, verdict)
+        self.hits += journal['hits']
+        self.misses += journal['misses']
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size': len(self.verdicts),
+            'maxsize': self.maxsize,
+            'rule_version': self.rule_version
+        }
+
+    def load(self) -> int:
+        """Read verdicts saved by save(); a file written under other rules is ignored"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring unreadable URL verdict cache {self.path}: {e}")
+            return 0
+
+        if not isinstance(saved, dict) or saved.get('rule_version') != self.rule_version:
+            print(f"URL verdict cache {self.path.name} was written for other URL rules, starting empty")
+            return 0
+
+        # Saved least recently used first; keep the most recent maxsize entries
+        for url, verdict in saved.get('verdicts', [])[-self.maxsize:]:
+            self.verdicts[url] = verdict
+        return len(self.verdicts)
+
+    def save(self):
+        """Write the verdicts atomically (temp file + rename), tagged with the rule version"""
+        if self.path is None:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'rule_version': self.rule_version,
+                'saved_at': datetime.now().isoformat(),
+                'verdicts': list(self.verdicts.items())
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,80 @@
+"""
+Phishing Email Detection - Per-email URL Context
+URLs are extracted from an email once, parsed once, and shared by every analysis stage
+"""
+import re
+from typing import Dict, List, NamedTuple
+
+from domain_resolver import default_resolver
+from pattern_matcher import MultiPatternMatcher
+
+
+# Same language as EmailFeatureExtractor.url_pattern (whose alternatives are all single
+# characters, '%' included) written as one character class, so the scan is linear
+URL_PATTERN = re.compile(r'http[s]?://[a-zA-Z0-9$-_@.&+!*\\(),%]+')
+IP_PATTERN = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+# [scheme:][//]authority/path - cheaper than urllib.parse.urlsplit for the two parts we need,
+# and lenient about scraper URLs that come without a scheme
+URL_PARTS = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:(?=//))?(?://)?([^/?#]*)([^?#]*)')
+
+
+class ParsedUrl(NamedTuple):
+    """One URL with everything the feature, risk and red-flag stages read from it"""
+    url: str
+    lower: str
+    host: str
+    domain: str
+    suffix: str  # public suffix (TLD), from domain_resolver
+    registered_domain: str  # f"{domain}.{suffix}", the key the URL/sender features compare
+    path: str
+    has_ip: bool  # an IPv4-looking run anywhere in the URL (URL features)
+    host_is_ip: bool  # the host itself is an IPv4/IPv6 literal (URL risk rules)
+    hits: Dict[str, List[str]]  # MultiPatternMatcher hits on the lowercased URL
+
+
+def parse_url(url: str, matcher: MultiPatternMatcher) -> ParsedUrl:
+    """Split a URL into host, registered domain, TLD and path and run the shared matcher on it"""
+    extracted = default_resolver().extract(url)
+    parts = URL_PARTS.match(url)
+    # Drop userinfo and port, like urlsplit().hostname
+    host = parts.group(1).rpartition('@')[2]
+    is_ipv6 = host.startswith('[')
+    host = host[1:host.find(']')] if is_ipv6 else host.partition(':')[0]
+    host, path = host.lower().rstrip('.'), parts.group(2)
+
+    lower = url.lower()
+    return ParsedUrl(
+        url=url,
+        lower=lower,
+        host=host,
+        domain=extracted.domain,
+        suffix=extracted.suffix,
+        registered_domain=f"{extracted.domain}.{extracted.suffix}",
+        path=path,
+        has_ip=IP_PATTERN.search(url) is not None,
+        host_is_ip=is_ipv6 or IP_PATTERN.fullmatch(host) is not None,
+        hits=matcher.scan(lower)
+    )
+
+
+class UrlContext:
+    """URLs of one email - found in the body and supplied by the scraper - each parsed once"""
+
+    def __init__(self, body: str, scraped_urls: List[str], matcher: MultiPatternMatcher):
+        self.matcher = matcher
+        self.parsed = {}
+        self.body_urls = [self.parse(url) for url in URL_PATTERN.findall(str(body))]
+        # Scraped URLs are only risk-scored, so they are parsed on demand (cached verdicts skip it)
+        self.scraped = list(scraped_urls)
+
+    @property
+    def scraped_urls(self) -> List[ParsedUrl]:
+        """The scraper-supplied URLs, parsed"""
+        return [self.parse(url) for url in self.scraped]
+
+    def parse(self, url: str) -> ParsedUrl:
+        """Parse a URL, reusing the result for repeats within the email"""
+        parsed = self.parsed.get(url)
+        if parsed is None:
+            parsed = self.parsed[url] = parse_url(url, self.matcher)
+        return parsed
@@ -1,16 +1,14 @@
 """
 Automated Phishing Detection Monitor
 Watches emails_data.json for changes and runs phishing detection automatically
-Saves results to phishing_results.json
+Saves results to the results store (phishing_results.db) and exports phishing_results.json
 """
 
 import os
-import json
-import time
+import sqlite3
 import sys
 from datetime import datetime
 from pathlib import Path
-import hashlib
 
 # Change to Phishing_Model directory for model to find its files
 SCRIPT_DIR = Path(__file__).parent
@@ -21,53 +19,32 @@ os.chdir(PHISHING_MODEL_DIR)
 sys.path.insert(0, str(PHISHING_MODEL_DIR))
 
 from phishing_detector import PhishingDetector
+from email_source import EmailSource
+from file_watcher import FileWatcher
+from process_emails import open_results_store
 
 # File paths (relative to parent directory)
 EMAILS_DATA_FILE = SCRIPT_DIR / "emails_data.json"
 RESULTS_FILE = SCRIPT_DIR / "phishing_results.json"
-LAST_HASH_FILE = SCRIPT_DIR / ".last_emails_hash"
+# How far --monitor has read emails_data.json (byte offset + fingerprint)
+INGEST_STATE_FILE = SCRIPT_DIR / ".auto_detect_ingest_state.json"
+URL_CACHE_FILE = SCRIPT_DIR / ".url_verdict_cache.json"
+RESULT_CACHE_DIR = SCRIPT_DIR / ".result_cache"
 
-def calculate_file_hash(filepath):
-    """Calculate MD5 hash of file to detect changes"""
-    if isinstance(filepath, str):
-        filepath = Path(filepath)
-    if not filepath.exists():
-        return None
-    
-    hash_md5 = hashlib.md5()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
-
-def get_last_processed_hash():
-    """Get hash of last processed file"""
-    if LAST_HASH_FILE.exists():
-        with open(LAST_HASH_FILE, 'r') as f:
-            return f.read().strip()
-    return None
-
-def save_current_hash(file_hash):
-    """Save current file hash"""
-    with open(LAST_HASH_FILE, 'w') as f:
-        f.write(file_hash)
-
-def load_emails():
-    """Load emails from emails_data.json"""
+def load_emails(source=None):
+    """Load emails from emails_data.json (with a source: only those added since its last commit)"""
     if not EMAILS_DATA_FILE.exists():
         print(f"❌ Error: {EMAILS_DATA_FILE} not found!")
         return None
     
     try:
-        # Try utf-8-sig first to handle BOM, then fall back to utf-8
-        try:
-            with open(EMAILS_DATA_FILE, 'r', encoding='utf-8-sig') as f:
-                emails = json.load(f)
-        except:
-            with open(EMAILS_DATA_FILE, 'r', encoding='utf-8') as f:
-                emails = json.load(f)
+        # Streamed JSON array or JSONL, with or without BOM; an email still being written is left out
+        if source is not None:
+            emails = source.read_new()
+        else:
+            emails = EmailSource(EMAILS_DATA_FILE).read_all()
         
-        print(f"✅ Loaded {len(emails)} emails from {EMAILS_DATA_FILE.name}")
+        print(f"Loaded {len(emails)} {'new ' if source is not None else ''}emails from {EMAILS_DATA_FILE.name}")
         return emails
     except Exception as e:
         print(f"❌ Error loading emails: {e}")
@@ -77,59 +54,25 @@ def process_emails(detector, emails):
     """Process emails and return results"""
     print(f"\n🔄 Processing {len(emails)} emails...")
     
-    results = []
-    phishing_count = 0
-    legitimate_count = 0
+    # One batched pass: model scores, URL verdicts and cached results are shared across the emails
+    analysis = detector.analyze_batch(emails)
+    results = analysis['results']
+    for email, result in zip(emails, results):
+        if 'error' in result:
+            print(f"   Error processing email {email.get('email_id', 'unknown')}: {result['error']}")
     
-    for idx, email in enumerate(emails, 1):
-        try:
-            # Analyze email
-            result = detector.predict_single(email)
-            
-            # Count verdicts
-            if result['is_phishing']:
-                phishing_count += 1
-            else:
-                legitimate_count += 1
-            
-            results.append(result)
-            
-            # Progress indicator
-            if idx % 5 == 0 or idx == len(emails):
-                print(f"   Processed: {idx}/{len(emails)} emails...")
-                
-        except Exception as e:
-            print(f"   ⚠️  Error processing email {email.get('email_id', 'unknown')}: {e}")
-            # Add error result
-            results.append({
-                'email_id': email.get('email_id', 'unknown'),
-                'error': str(e),
-                'is_phishing': False,
-                'phishing_probability': 0.0
-            })
-    
-    return results, phishing_count, legitimate_count
+    summary = analysis['batch_summary']
+    return results, summary['phishing_detected'], summary['legitimate']
 
-def save_results(results, phishing_count, legitimate_count):
-    """Save results to phishing_results.json"""
-    output = {
-        'metadata': {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'total_emails': len(results),
-            'phishing_detected': phishing_count,
-            'legitimate_detected': legitimate_count,
-            'phishing_percentage': f"{(phishing_count / len(results) * 100):.1f}%" if results else "0.0%"
-        },
-        'emails': results
-    }
-    
+def save_results(store, results):
+    """Upsert results into the store and export phishing_results.json (same writer and format as process_emails.py)"""
     try:
-        with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
-        print(f"\n✅ Results saved to {RESULTS_FILE}")
+        store.upsert(results)
+        store.export_json(RESULTS_FILE)
+        print(f"\nResults saved to {RESULTS_FILE}")
         return True
-    except Exception as e:
-        print(f"\n❌ Error saving results: {e}")
+    except (sqlite3.Error, OSError) as e:
+        print(f"\nERROR: Could not save results: {e}")
         return False
 
 def run_detection():
@@ -166,7 +109,11 @@ def run_detection():
     print(f"   Phishing Rate: {(phishing_count / len(results) * 100):.1f}%")
     
     # Save results
-    success = save_results(results, phishing_count, legitimate_count)
+    store = open_results_store()
+    try:
+        success = save_results(store, results)
+    finally:
+        store.close()
     
     if success:
         print("\n✅ Detection completed successfully!")
@@ -181,80 +128,86 @@ def monitor_file(check_interval=5):
     print("="*80)
     print(f"\n📁 Monitoring: {EMAILS_DATA_FILE.name}")
     print(f"💾 Output: {RESULTS_FILE.name}")
-    print(f"🔄 Check interval: {check_interval} seconds")
+    print(f"Check interval: {check_interval} seconds (only without inotify)")
     print("\n⏳ Waiting for changes... (Press Ctrl+C to stop)")
     print("="*80)
     
     # Initialize detector once
     print("\n🤖 Pre-loading model for faster processing...")
     try:
-        detector = PhishingDetector()
+        # URL verdicts and analysis results persist across monitor restarts
+        # (dropped when the URL rules or the model change)
+        detector = PhishingDetector(url_cache_path=URL_CACHE_FILE, result_cache_path=RESULT_CACHE_DIR)
         print("✅ Model loaded and ready!")
     except Exception as e:
         print(f"❌ Error loading model: {e}")
         return
     
-    last_processed_hash = get_last_processed_hash()
-    
-    # Check if file exists and process immediately if it's new or changed
-    if EMAILS_DATA_FILE.exists():
-        current_hash = calculate_file_hash(EMAILS_DATA_FILE)
-        if current_hash != last_processed_hash:
-            print(f"\n🔔 Initial processing of {EMAILS_DATA_FILE.name}...")
+    # inotify wakes up on writes, without it the file is stat-polled; started first so no write is missed
+    watcher = FileWatcher(EMAILS_DATA_FILE, poll_interval=check_interval)
+    # Only emails appended since the last round (or monitor run) are analyzed; earlier results
+    # stay in the store, which the export is written from
+    store = open_results_store()
+    source = EmailSource(EMAILS_DATA_FILE, INGEST_STATE_FILE)
+    if source.checkpoint is not None and not len(store):
+        # The emails before the saved offset have no stored results: read emails_data.json from the start
+        print("No stored results for the emails read before, analyzing all emails again")
+        source.checkpoint = None
+    
+    def process_new_emails():
+        """Analyze the emails added since the last round (and those that failed in it) and save them"""
+        emails = load_emails(source)
+        if emails is None:
+            return
+        if emails:
+            results, _, _ = process_emails(detector, emails)
+            if not save_results(store, results):
+                return
+            detector.save_url_cache()
+            # Failed analyses are analyzed again after the next change
+            failed = [email for email, result in zip(emails, results) if 'error' in result]
+            source.requeue(failed)
+            summary = store.summary()
             
-            emails = load_emails()
-            if emails:
-                results, phishing_count, legitimate_count = process_emails(detector, emails)
-                
-                print("\n" + "="*80)
-                print("📊 ANALYSIS SUMMARY")
-                print("="*80)
-                print(f"   Total Emails: {len(results)}")
-                print(f"   🚨 Phishing: {phishing_count}")
-                print(f"   ✅ Legitimate: {legitimate_count}")
-                print(f"   Phishing Rate: {(phishing_count / len(results) * 100):.1f}%")
-                
-                save_results(results, phishing_count, legitimate_count)
-                save_current_hash(current_hash)
-                print("\n✅ Initial processing complete!")
-                print("="*80)
+            print("\n" + "="*80)
+            print("ANALYSIS SUMMARY")
+            print("="*80)
+            print(f"   New Emails: {len(results)}")
+            if failed:
+                print(f"   Failed (retried after the next change): {len(failed)}")
+            print(f"   Total Emails: {summary['total_emails']}")
+            print(f"   Phishing: {summary['phishing_detected']}")
+            print(f"   Legitimate: {summary['legitimate']}")
+            print(f"   Phishing Rate: {summary['phishing_percentage']:.1f}%")
+        source.commit()
+    
+    # Process emails added while the monitor was not running
+    if EMAILS_DATA_FILE.exists():
+        print(f"\nInitial processing of {EMAILS_DATA_FILE.name}...")
+        process_new_emails()
+        print("\nInitial processing complete")
+        print("="*80)
     
     # Monitor for changes
     try:
         while True:
-            if EMAILS_DATA_FILE.exists():
-                current_hash = calculate_file_hash(EMAILS_DATA_FILE)
+            if watcher.wait():
+                print(f"\n\nCHANGE DETECTED in {EMAILS_DATA_FILE.name}")
+                print("="*80)
+                print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 
-                if current_hash != last_processed_hash:
-                    print(f"\n\n🔔 CHANGE DETECTED in {EMAILS_DATA_FILE.name}!")
-                    print("="*80)
-                    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Load and process emails
-                    emails = load_emails()
-                    if emails:
-                        results, phishing_count, legitimate_count = process_emails(detector, emails)
-                        
-                        print("\n" + "="*80)
-                        print("📊 ANALYSIS SUMMARY")
-                        print("="*80)
-                        print(f"   Total Emails: {len(results)}")
-                        print(f"   🚨 Phishing: {phishing_count}")
-                        print(f"   ✅ Legitimate: {legitimate_count}")
-                        print(f"   Phishing Rate: {(phishing_count / len(results) * 100):.1f}%")
-                        
-                        save_results(results, phishing_count, legitimate_count)
-                        save_current_hash(current_hash)
-                        last_processed_hash = current_hash
-                        
-                        print("\n✅ Processing complete! Resuming monitoring...")
-                        print("="*80)
-            
-            time.sleep(check_interval)
+                process_new_emails()
+                
+                print("\nProcessing complete. Resuming monitoring...")
+                print("="*80)
             
     except KeyboardInterrupt:
         print("\n\n🛑 Monitor stopped by user")
         print("="*80)
+    finally:
+        watcher.close()
+        detector.close()
+        store.close()
 
 def main():
     """Main entry point"""
@@ -0,0 +1,2 @@
+# test_single_email.py is a demo script that analyzes an email when imported, not a pytest module
+collect_ignore = ['test_single_email.py']
@@ -0,0 +1,135 @@
+"""
+Resident Phishing Detection Daemon
+Loads the phishing model once, warms it up, and analyzes new emails in emails_data.json
+in-process whenever the file changes (no process_emails.py / phishing_detector.py subprocesses)
+"""
+
+import time
+from datetime import datetime
+
+from email_source import EmailSource
+from file_watcher import FileWatcher
+from processed_index import ProcessedIndex
+from process_emails import (EMAILS_FILE, INGEST_STATE_FILE, PROCESSED_IDS_FILE, RESULTS_DB, RESULTS_FILE,
+                            load_detector, open_results_store, process_new_emails)
+
+# Exercises tokenizer, model, feature and URL code paths before the first real email arrives
+WARMUP_EMAIL = {
+    'email_id': 'warmup',
+    'sender': 'warmup@example.com',
+    'subject': 'Verify your account',
+    'body_full': 'Please verify your account at http://example.com/login before it is suspended.',
+    'urls_found': ['http://example.com/login']
+}
+
+class DetectionDaemon:
+    """Long-lived detector process: one model load, then one in-process run per change event"""
+
+    def __init__(self, check_interval=5, debounce=0.1):
+        self.check_interval = check_interval
+        self.detector = None
+        self.process_count = 0
+        # check_interval only matters where inotify is unavailable (stat polling)
+        self.watcher = FileWatcher(EMAILS_FILE, debounce=debounce, poll_interval=check_interval)
+        # Each change event only parses the emails appended since the previous one
+        self.source = EmailSource(EMAILS_FILE, INGEST_STATE_FILE)
+        # Analyzed email IDs stay in memory between events (loaded from the log once)
+        self.index = ProcessedIndex(PROCESSED_IDS_FILE)
+        # One connection for the daemon's lifetime; each event upserts only its new results
+        self.store = open_results_store()
+
+    def start(self):
+        """Load and warm up the model; returns the seconds it took"""
+        start = time.perf_counter()
+        self.detector = load_detector()
+        self.warm_up()
+        elapsed = time.perf_counter() - start
+        print(f"Model loaded and warmed up in {elapsed:.1f}s")
+        return elapsed
+
+    def warm_up(self):
+        """Run one email through every stage so the first change event pays no lazy initialization"""
+        features = self.detector.extract_features_batch([WARMUP_EMAIL])
+        self.detector.predict_batch([WARMUP_EMAIL])
+        if self.detector.cascade is not None:
+            self.detector.cascade_predictions([WARMUP_EMAIL], features)
+        # Bypasses the URL verdict cache so the warm-up URL does not end up in it
+        self.detector.url_rules.evaluate_batch(WARMUP_EMAIL['urls_found'])
+
+    def process(self, reason="Change detected"):
+        """Handle one change event: analyze new emails in-process; True on success"""
+        if self.detector is None:
+            self.start()
+
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {reason}")
+        print("="*80)
+        start = time.perf_counter()
+        success = process_new_emails(self.detector, self.source, self.index, self.store)
+        if success:
+            self.process_count += 1
+            print(f"Processing complete in {time.perf_counter() - start:.2f}s")
+        else:
+            print(f"Processing failed. Will retry on next change...")
+        print("="*80)
+        return success
+
+    def close(self):
+        """Persist caches, stop scoring workers, the file watcher and the results store"""
+        if self.detector is not None:
+            self.detector.close()
+            self.detector = None
+        self.watcher.close()
+        self.store.close()
+
+    def run(self):
+        """Wait for writes to emails_data.json and process each change until Ctrl+C"""
+        print("="*80)
+        print("PHISHING DETECTION - RESIDENT DAEMON")
+        print("="*80)
+        print(f"\nMonitoring: {EMAILS_FILE.name}")
+        print(f"Output: {RESULTS_DB.name} (exported to {RESULTS_FILE.name})")
+        if self.watcher.mode == 'inotify':
+            print(f"Watching: inotify (debounce {self.watcher.debounce * 1000:.0f} ms)")
+        else:
+            print(f"Check interval: {self.check_interval} seconds (stat polling)")
+        print(f"Press Ctrl+C to stop\n")
+        print("="*80)
+
+        if not EMAILS_FILE.exists():
+            print(f"\nWarning: {EMAILS_FILE} not found!")
+            print(f"   Waiting for file to be created...\n")
+
+        try:
+            self.start()
+            if EMAILS_FILE.exists():
+                self.process(f"Processing existing {EMAILS_FILE.name}...")
+            print(f"Monitoring for changes...\n")
+
+            while True:
+                if self.watcher.wait():
+                    self.process(f"CHANGE DETECTED in {EMAILS_FILE.name}")
+                    print(f"Monitoring for changes...\n")
+        except KeyboardInterrupt:
+            print("\n\nDaemon stopped by user")
+            print("="*80)
+            print(f"Processing runs: {self.process_count}")
+            print(f"Final results in: {RESULTS_FILE}")
+            print("="*80)
+        finally:
+            self.close()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resident Phishing Detection Daemon')
+    parser.add_argument('--interval', type=int, default=5,
+                        help='Check interval in seconds without inotify (default: 5)')
+    parser.add_argument('--debounce', type=float, default=0.1,
+                        help='Seconds of quiet after a write before processing (default: 0.1)')
+
+    args = parser.parse_args()
+
+    DetectionDaemon(check_interval=args.interval, debounce=args.debounce).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Incremental Email Ingestion
+Reads only the emails added to emails_data.json since the last run: JSONL (one email per line)
+past a saved byte offset, or the legacy JSON array streamed from the end of its last read element.
+A record UiPath is still writing is left for the next run.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+from pathlib import Path
+
+BOM = b'\xef\xbb\xbf'
+# Bytes hashed at both ends of the already-read prefix to notice a rewritten file
+FINGERPRINT_BYTES = 4096
+WHITESPACE = ' \t\r\n'
+
+def strip_bom(data):
+    """Bytes without a leading UTF-8 byte order mark"""
+    return data[len(BOM):] if data.startswith(BOM) else data
+
+def element_end(text, pos):
+    """
+    Index just past the array element starting at pos, found by bracket depth outside strings
+    (so it also works on elements that are not valid JSON); None if text ends inside it.
+    """
+    depth = 0
+    in_string = escaped = False
+    for i in range(pos, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            if depth == 0:
+                # The array's closing bracket ends the element; a stray brace is part of it
+                if char == ']':
+                    return i
+                continue
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif char == ',' and depth == 0:
+            return i
+    return None
+
+class EmailSource:
+    """Emails file reader that remembers (per format) how far it got"""
+
+    def __init__(self, path, state_path=None, chunk_size=1 << 20):
+        self.path = Path(path)
+        self.state_path = Path(state_path) if state_path is not None else None
+        self.chunk_size = chunk_size
+        self.format = None
+        # Checkpoint of the last committed read; `pending` is the one reached by read_new()
+        self.checkpoint = self.load_state()
+        self.pending = None
+        # True when the last read_new() started over because the file was rewritten
+        self.restarted = False
+        # Invalid records the last read_new() skipped
+        self.skipped = 0
+        # Emails requeued by the last commit that the last read_new() returned again
+        self.retried = 0
+
+    # ==================== CHECKPOINT ====================
+
+    def load_state(self):
+        """Saved checkpoint, or None"""
+        if self.state_path is None or not self.state_path.exists():
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable ingest state {self.state_path.name}: {e}")
+            return None
+        return state if isinstance(state, dict) and state.get('file') == self.path.name else None
+
+    def fingerprint(self, f, offset):
+        """Hashes of the first and last FINGERPRINT_BYTES before offset"""
+        f.seek(0)
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        tail = f.read(offset - max(0, offset - FINGERPRINT_BYTES))
+        return hashlib.sha1(head).hexdigest(), hashlib.sha1(tail).hexdigest()
+
+    def make_checkpoint(self, f, offset, expect=None):
+        """Checkpoint at a byte offset (expect: next array token, 'value' or 'sep')"""
+        head, tail = self.fingerprint(f, offset)
+        return {'file': self.path.name, 'format': self.format, 'offset': offset, 'expect': expect,
+                'head': head, 'tail': tail}
+
+    def resume_point(self, f, size):
+        """Checkpoint to continue from, or None to read from the start"""
+        checkpoint = self.checkpoint
+        if checkpoint is None or checkpoint.get('format') != self.format:
+            return None
+        offset = checkpoint['offset']
+        if offset > size or (checkpoint['head'], checkpoint['tail']) != self.fingerprint(f, offset):
+            return None
+        return checkpoint
+
+    def requeue(self, emails):
+        """Return emails read by read_new() again from the next read_new() after commit() (e.g. failed analyses)"""
+        if self.pending is not None:
+            self.pending['retry'] = list(emails)
+
+    def commit(self):
+        """Make the position reached by read_new() the new starting point (after processing succeeded)"""
+        if self.pending is None:
+            return
+        self.checkpoint, self.pending = self.pending, None
+        if self.state_path is not None:
+            tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.checkpoint, f)
+            os.replace(tmp_path, self.state_path)
+
+    # ==================== READING ====================
+
+    def detect_format(self, f):
+        """'array' (legacy JSON array), 'jsonl', or None for an empty file"""
+        f.seek(0)
+        start = strip_bom(f.read(4096)).lstrip()
+        if not start:
+            return None
+        return 'array' if start[:1] == b'[' else 'jsonl'
+
+    def read_new(self):
+        """Emails requeued by the last commit() and those added since; the whole file when it was rewritten"""
+        self.restarted = False
+        self.skipped = 0
+        self.retried = 0
+        if not self.path.exists():
+            return []
+
+        with open(self.path, 'rb') as f:
+            self.format = self.detect_format(f)
+            if self.format is None:
+                return []
+            size = f.seek(0, os.SEEK_END)
+            checkpoint = self.resume_point(f, size)
+            if checkpoint is None and self.checkpoint is not None:
+                print(f"{self.path.name} was rewritten, reading it from the start")
+                self.restarted = True
+            offset = checkpoint['offset'] if checkpoint else 0
+
+            if self.format == 'jsonl':
+                emails, offset = self.read_jsonl(f, offset)
+                self.pending = self.make_checkpoint(f, offset)
+            else:
+                expect = checkpoint['expect'] if checkpoint else None
+                emails, offset, expect = self.read_array(f, offset, expect)
+                self.pending = self.make_checkpoint(f, offset, expect)
+        if self.skipped:
+            print(f"Warning: Skipped {self.skipped} invalid record(s) in {self.path.name}")
+        # Requeued emails lie before the offset (when the file was rewritten, they are read again anyway);
+        # a newer copy of one in the new emails replaces it
+        retry = checkpoint.get('retry', []) if checkpoint else []
+        if retry:
+            new_ids = {email.get('email_id') for email in emails} - {None}
+            retry = [email for email in retry if email.get('email_id') not in new_ids]
+        if retry:
+            self.retried = len(retry)
+            print(f"Retrying {self.retried} email(s) requeued by the last run")
+        return retry + emails
+
+    def read_all(self):
+        """Every email in the file (streamed; the checkpoint is not touched)"""
+        saved = self.checkpoint, self.pending, self.restarted, self.skipped, self.retried
+        self.checkpoint = None
+        try:
+            return self.read_new()
+        finally:
+            self.checkpoint, self.pending, self.restarted, self.skipped, self.retried = saved
+
+    def read_jsonl(self, f, offset):
+        """Complete lines past offset; returns (emails, offset after the last complete line)"""
+        emails = []
+        f.seek(offset)
+        buffer = b''
+        while True:
+            chunk = f.read(self.chunk_size)
+            if not chunk:
+                break
+            lines = (buffer + chunk).split(b'\n')
+            buffer = lines.pop()
+            for line in lines:
+                record = self.parse_line(line, offset)
+                offset += len(line) + 1
+                if record is not None:
+                    emails.append(record)
+
+        # Last line without its newline: complete if it parses, otherwise still being written
+        if buffer.strip():
+            record = self.parse_line(buffer, offset, final=True)
+            if record is not None:
+                emails.append(record)
+                offset += len(buffer)
+
+        return emails, offset
+
+    def parse_line(self, line, offset, final=False):
+        """One JSONL record; None for blank, invalid or (final) incomplete lines"""
+        line = strip_bom(line) if offset == 0 else line
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if final:
+                print(f"Waiting for the last record of {self.path.name} to be completed (byte {offset})")
+            else:
+                print(f"Warning: Skipping invalid JSONL line at byte {offset} of {self.path.name}")
+                self.skipped += 1
+            return None
+        if not isinstance(record, dict):
+            return None
+        return record
+
+    def read_array(self, f, offset, expect=None):
+        """
+        Elements of the JSON array past offset, one raw_decode at a time.
+        Returns (emails, offset just past the last complete element, next expected token).
+        """
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        f.seek(offset)
+        emails = []
+        text, pos, eof = '', 0, False
+        expect = expect or 'start'
+        # Checkpoint: `base` is the index in text that corresponds to byte `offset`,
+        # where the next token is `checkpoint_expect` (a ',' read after it is not checkpointed)
+        base, checkpoint_expect = 0, expect
+
+        def read_more(size):
+            nonlocal text, pos, base, eof
+            chunk = f.read(size)
+            eof = not chunk
+            # Drop what has been consumed so the buffer only holds the current element
+            text, pos, base = text[base:] + text_decoder.decode(chunk, final=eof), pos - base, 0
+
+        read_more(self.chunk_size)
+        while True:
+            while pos < len(text) and text[pos] in WHITESPACE:
+                pos += 1
+            if pos == len(text):
+                if eof:
+                    break
+                read_more(self.chunk_size)
+                continue
+
+            char = text[pos]
+            if expect == 'start':
+                if char == '\ufeff':
+                    pos += 1
+                    continue
+                if char != '[':
+                    raise ValueError(f"{self.path.name} does not start with a JSON array")
+                pos += 1
+                expect = 'value'
+            elif char == ']':
+                # End of the array as written so far; appends replace this bracket
+                break
+            elif expect == 'sep' and char == ',':
+                pos += 1
+                expect = 'value'
+                continue
+            else:
+                if expect == 'value':
+                    try:
+                        record, end = decoder.raw_decode(text, pos)
+                        valid = True
+                    except ValueError:
+                        record, end, valid = None, element_end(text, pos), False
+                else:
+                    # Junk after an element (e.g. the 'x' of 'NaNx'): skipped up to the next separator
+                    record, end, valid = None, element_end(text, pos), False
+                if end is None or (end == len(text) and not eof):
+                    if eof:
+                        print(f"Waiting for the last email of {self.path.name} to be completed (byte {offset})")
+                        break
+                    # Element spans the buffer: read at least as much again as is buffered
+                    read_more(max(self.chunk_size, len(text)))
+                    continue
+                if not valid:
+                    # Skipped (and checkpointed past) so later runs do not stop here again
+                    print(f"Warning: Skipping invalid email at byte "
+                          f"{offset + len(text[base:pos].encode('utf-8'))} of {self.path.name}")
+                    self.skipped += 1
+                elif isinstance(record, dict):
+                    emails.append(record)
+                pos = end
+                expect = 'sep'
+
+            offset += len(text[base:pos].encode('utf-8'))
+            base, checkpoint_expect = pos, expect
+        return emails, offset, checkpoint_expect
@@ -0,0 +1,149 @@
+"""
+Email File Watcher
+Wakes up when emails_data.json is written: inotify on Linux, cheap os.stat polling elsewhere.
+Bursts of partial writes are debounced into one change event.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+# inotify event masks (<sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+# The directory is watched, so editors and writers that replace the file (write temp + rename) are seen
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len (name follows)
+
+def load_inotify():
+    """libc with the inotify calls, or None where inotify is unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+class FileWatcher:
+    """Blocks until one file changes; a write burst counts once it has been quiet for `debounce` seconds"""
+
+    def __init__(self, path, debounce=0.1, poll_interval=1.0, max_settle=5.0, use_inotify=True):
+        self.path = Path(path).resolve()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        # A writer that never pauses still produces an event every max_settle seconds
+        self.max_settle = max_settle
+        self.fd = None
+        self.mode = 'stat'
+
+        libc = load_inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, bytes(self.path.parent), WATCH_MASK) >= 0:
+                self.fd = fd
+                self.mode = 'inotify'
+            else:
+                if fd >= 0:
+                    os.close(fd)
+                print(f"WARNING: inotify unavailable ({os.strerror(ctypes.get_errno())}), "
+                      f"polling {self.path.name} every {poll_interval}s")
+
+        self.seen = self.signature()
+
+    def signature(self):
+        """(inode, size, mtime) of the file, None if it does not exist"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def read_events(self):
+        """Drain pending inotify events; True if any concerned the watched file"""
+        relevant = False
+        name = os.fsencode(self.path.name)
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                if mask & IN_Q_OVERFLOW or data[offset:offset + length].rstrip(b'\0') == name:
+                    relevant = True
+                offset += length
+
+    def next_event(self, timeout):
+        """Wait for the first write to the file; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self.fd is not None:
+                ready, _, _ = select.select([self.fd], [], [], remaining)
+                if ready and self.read_events():
+                    return True
+            else:
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+                if self.signature() != self.seen:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def settle(self):
+        """Wait until the file has been quiet for `debounce` seconds (at most max_settle)"""
+        give_up = time.monotonic() + self.max_settle
+        if self.fd is not None:
+            while time.monotonic() < give_up:
+                ready, _, _ = select.select([self.fd], [], [], self.debounce)
+                if not ready or not self.read_events():
+                    return
+        else:
+            last = self.signature()
+            while time.monotonic() < give_up:
+                time.sleep(self.debounce)
+                current = self.signature()
+                if current == last:
+                    return
+                last = current
+
+    def wait(self, timeout=None):
+        """Block until the file exists with new content and writes have settled; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.next_event(remaining):
+                return False
+            self.settle()
+            current = self.signature()
+            if current is not None and current != self.seen:
+                self.seen = current
+                return True
+            # Deleted, or touched without new content
+            self.seen = current
+
+    def mark_seen(self):
+        """Treat the file's current content as handled (e.g. after writing it ourselves)"""
+        if self.fd is not None:
+            self.read_events()
+        self.seen = self.signature()
+
+    def close(self):
+        """Release the inotify descriptor"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -1,16 +1,18 @@
 """
 Automatic Phishing Detection Processor
-Processes emails_data.json and saves results to phishing_results.json
-Only processes emails with isPredicted=0 flag
+Processes emails_data.json, stores results in phishing_results.db and exports them to phishing_results.json
+Only processes emails added since the last run and not yet in the processed-ID index
+(emails_data.json itself is never rewritten)
 """
 
-import json
-import subprocess
 import sys
-import os
 from pathlib import Path
 from datetime import datetime
 
+from email_source import EmailSource
+from processed_index import ProcessedIndex
+from results_store import ResultsStore
+
 # Fix console encoding for Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -19,208 +21,166 @@ if sys.platform == 'win32':
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 EMAILS_FILE = SCRIPT_DIR / "emails_data.json"
-TEMP_FILE = SCRIPT_DIR / "temp_emails.json"
 RESULTS_FILE = SCRIPT_DIR / "phishing_results.json"
+# Every result ever saved, upserted by email_id (phishing_results.json is exported from it)
+RESULTS_DB = SCRIPT_DIR / "phishing_results.db"
 PHISHING_MODEL_DIR = SCRIPT_DIR / "Phishing_Model"
 PHISHING_DETECTOR = PHISHING_MODEL_DIR / "phishing_detector.py"
+# Torch-free weights written by: python export_model.py numpy
+NUMPY_WEIGHTS = PHISHING_MODEL_DIR / "models" / "lstm_model.npz"
+# Memory-mapped weights + vocabulary written by: python export_model.py bundle
+MODEL_BUNDLE = PHISHING_MODEL_DIR / "models" / "model.bundle"
+# URL verdicts kept across runs (dropped when the URL rules change)
+URL_CACHE_FILE = SCRIPT_DIR / ".url_verdict_cache.json"
+# How far emails_data.json has been read (byte offset + fingerprint)
+INGEST_STATE_FILE = SCRIPT_DIR / ".emails_ingest_state.json"
+# IDs of analyzed emails, one per line (replaces writing isPredicted back into emails_data.json)
+PROCESSED_IDS_FILE = SCRIPT_DIR / ".processed_ids.log"
 
-def initialize_flags_in_emails():
-    """Add isPredicted flag to all emails if not present"""
-    try:
-        with open(EMAILS_FILE, 'r', encoding='utf-8-sig') as f:
-            emails = json.load(f)
-        
-        modified = False
-        for email in emails:
-            if 'isPredicted' not in email:
-                email['isPredicted'] = 0
-                modified = True
-        
-        if modified:
-            # Save back with flags
-            with open(EMAILS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(emails, f, indent=2, ensure_ascii=False)
-            print(f"Initialized isPredicted flags for {len(emails)} emails")
-        
-        return True
-    except Exception as e:
-        print(f"Error initializing flags: {e}")
-        return False
+sys.path.insert(0, str(PHISHING_MODEL_DIR))
 
-def load_and_filter_emails():
-    """Load emails and filter only those with isPredicted=0"""
-    print(f"Loading emails from: {EMAILS_FILE.name}")
+def load_and_filter_emails(source, index):
+    """Read the emails added since the last run and keep those not analyzed yet"""
+    print(f"Loading new emails from: {EMAILS_FILE.name}")
     
     if not EMAILS_FILE.exists():
         print(f"Error: {EMAILS_FILE} not found!")
         return None, None
     
     try:
-        # Load with BOM handling
-        with open(EMAILS_FILE, 'r', encoding='utf-8-sig') as f:
-            all_emails = json.load(f)
+        # Only the bytes past the saved offset are parsed (all of them if the file was rewritten)
+        new_emails = source.read_new()
         
-        print(f"Loaded {len(all_emails)} total emails")
+        print(f"Loaded {len(new_emails)} new emails ({source.format or 'empty'} file)")
         
-        # Filter emails with isPredicted=0 (not yet processed)
+        # Filter emails not in the index (isPredicted=1 marks emails flagged by earlier versions)
         unprocessed_emails = [
-            email for email in all_emails 
-            if email.get('isPredicted', 0) == 0
+            email for email in new_emails 
+            if email.get('isPredicted', 0) == 0 and email.get('email_id') not in index
         ]
         
         if not unprocessed_emails:
             print("No new emails to process (all emails already analyzed)")
-            return all_emails, []
+            return new_emails, []
         
         print(f"Found {len(unprocessed_emails)} new emails to analyze")
-        print(f"Skipping {len(all_emails) - len(unprocessed_emails)} already processed emails")
+        if len(new_emails) > len(unprocessed_emails):
+            print(f"Skipping {len(new_emails) - len(unprocessed_emails)} already processed emails")
         
-        # Save unprocessed emails to temp file for model
-        with open(TEMP_FILE, 'w', encoding='utf-8') as f:
-            json.dump(unprocessed_emails, f, indent=2, ensure_ascii=False)
-        
-        return all_emails, unprocessed_emails
+        return new_emails, unprocessed_emails
     except Exception as e:
         print(f"Error: {e}")
         return None, None
 
-def update_flags_in_source(all_emails, processed_email_ids):
-    """Update isPredicted flag to 1 for processed emails in emails_data.json"""
-    try:
-        for email in all_emails:
-            if email['email_id'] in processed_email_ids:
-                email['isPredicted'] = 1
-        
-        # Save updated emails back to source file
-        with open(EMAILS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(all_emails, f, indent=2, ensure_ascii=False)
-        
-        print(f"Updated isPredicted flag for {len(processed_email_ids)} emails in source file")
-        return True
-    except Exception as e:
-        print(f"Error updating flags: {e}")
-        return False
+def load_detector():
+    """Load the phishing model once (NumPy engine when its weights were exported)"""
+    from phishing_detector import PhishingDetector
+    
+    # The NumPy engine skips importing torch, which dominates startup
+    if MODEL_BUNDLE.exists():
+        options = {'backend': 'numpy', 'use_bundle': True}
+    elif NUMPY_WEIGHTS.exists():
+        options = {'backend': 'numpy'}
+    else:
+        options = {}
+    
+    print(f"Loading phishing detection model...")
+    return PhishingDetector(model_dir=PHISHING_MODEL_DIR / "models", url_cache_path=URL_CACHE_FILE, **options)
 
-def merge_results_with_existing():
-    """Add isPredicted flag to results in phishing_results.json"""
-    try:
-        # Read the fresh results from the model
-        with open(RESULTS_FILE, 'r', encoding='utf-8') as f:
-            results = json.load(f)
-        
-        # Add isPredicted flag to each result
-        if 'results' in results:
-            for result in results['results']:
-                result['isPredicted'] = 1
-        
-        # Save the updated results
-        with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        
-        print(f"Added isPredicted flag to {len(results.get('results', []))} results")
-        return results
-    except Exception as e:
-        print(f"Error updating results: {e}")
-        return None
+def open_results_store():
+    """Open the results store, importing phishing_results.json the first time so earlier results are kept"""
+    store = ResultsStore(RESULTS_DB)
+    if not len(store) and RESULTS_FILE.exists():
+        try:
+            imported = store.import_json(RESULTS_FILE)
+            print(f"Imported {imported} earlier results from {RESULTS_FILE.name}")
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not import {RESULTS_FILE.name}: {e}")
+    return store
 
-def run_detection():
-    """Run phishing detection model"""
-    print(f"\nRunning phishing detection model...")
-    
-    cmd = [
-        sys.executable,
-        str(PHISHING_DETECTOR),
-        "--input", str(TEMP_FILE),
-        "--output", str(RESULTS_FILE),
-        "--pretty"
-    ]
+def run_detection(detector, emails, store):
+    """Analyze emails in-process, upsert them (flagged isPredicted=1) into the store and export phishing_results.json"""
+    print(f"\nRunning phishing detection model on {len(emails)} emails...")
     
     try:
-        # Set environment to handle Unicode
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        
-        result = subprocess.run(
-            cmd,
-            cwd=str(PHISHING_MODEL_DIR),
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env
-        )
-        
-        # Print model output
-        if result.stdout:
-            print(result.stdout)
-        
-        if result.returncode == 0:
-            print(f"Model analysis complete")
-            return True
-        else:
-            print(f"Error running model:")
-            if result.stderr:
-                print(result.stderr)
-            return False
-            
+        results = detector.analyze_batch(emails)
+        for result in results['results']:
+            result['isPredicted'] = 1
+        
+        # Earlier results stay in the store; the export holds all of them, not just this batch
+        # (stored JSON text is copied as is and the summary comes from the kept totals)
+        store.upsert(results['results'])
+        store.export_json(RESULTS_FILE)
+        detector.save_url_cache()
+        
+        summary = results['batch_summary']
+        print(f"Model analysis complete: {summary['phishing_detected']} phishing, "
+              f"{summary['legitimate']} legitimate")
+        return results
     except Exception as e:
-        print(f"Error: {e}")
-        return False
-    finally:
-        # Clean up temp file
-        if TEMP_FILE.exists():
-            TEMP_FILE.unlink()
+        print(f"Error running model: {e}")
+        return None
 
-def main():
-    print("="*80)
-    print("PHISHING DETECTION - AUTOMATIC PROCESSOR (Smart Mode)")
-    print("="*80)
-    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    
-    # Initialize flags in emails_data.json if needed
-    initialize_flags_in_emails()
-    
+def process_new_emails(detector, source, index, store):
+    """Analyze the emails added to emails_data.json since the last run; False on failure"""
     # Load and filter emails
-    all_emails, unprocessed_emails = load_and_filter_emails()
-    if all_emails is None:
+    new_emails, unprocessed_emails = load_and_filter_emails(source, index)
+    if new_emails is None:
         return False
     
     if not unprocessed_emails:
+        source.commit()
         print("\n" + "="*80)
         print("NO NEW EMAILS TO PROCESS")
         print("="*80)
-        print(f"\nAll {len(all_emails)} emails have already been analyzed")
+        print(f"\nNo unanalyzed emails added since the last run")
         print(f"Results: {RESULTS_FILE}\n")
         return True
     
-    # Run detection on unprocessed emails only
-    success = run_detection()
-    
-    if success:
-        # Update results with flags
-        print(f"\nUpdating results with flags...")
-        results = merge_results_with_existing()
-        
-        if results:
-            # Update flags in source file
-            processed_ids = [e['email_id'] for e in unprocessed_emails]
-            update_flags_in_source(all_emails, processed_ids)
-            
-            print("\n" + "="*80)
-            print("PROCESSING COMPLETE!")
-            print("="*80)
-            print(f"\nNew emails analyzed: {len(unprocessed_emails)}")
-            total_results = len(results.get('results', []))
-            print(f"Total results saved: {total_results}")
-            print(f"Results: {RESULTS_FILE}\n")
-        else:
-            print("\nError updating results!")
-            return False
-    else:
+    # Run detection on unprocessed emails only (not committed on failure: read again next run)
+    results = run_detection(detector, unprocessed_emails, store)
+    if results is None:
         print("\nProcessing failed!")
         return False
     
-    return success
+    # Record progress in the sidecar index; emails_data.json stays untouched. Failed analyses
+    # stay out of the index and are requeued, so the next run tries them again
+    failed = [email for email, result in zip(unprocessed_emails, results['results']) if 'error' in result]
+    failed_ids = {email.get('email_id') for email in failed}
+    index.add(email.get('email_id') for email in unprocessed_emails if email.get('email_id') not in failed_ids)
+    source.requeue(failed)
+    source.commit()
+    
+    print("\n" + "="*80)
+    print("PROCESSING COMPLETE!")
+    print("="*80)
+    print(f"\nNew emails analyzed: {len(unprocessed_emails) - len(failed)}")
+    if failed:
+        print(f"Failed (retried next run): {len(failed)}")
+    print(f"Total results stored: {len(store)}")
+    print(f"Results: {RESULTS_FILE}\n")
+    return True
+
+def main():
+    print("="*80)
+    print("PHISHING DETECTION - AUTOMATIC PROCESSOR (Smart Mode)")
+    print("="*80)
+    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    
+    # One-shot run: for continuous processing use detection_daemon.py, which keeps the model loaded
+    try:
+        detector = load_detector()
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        return False
+    
+    store = open_results_store()
+    try:
+        return process_new_emails(detector, EmailSource(EMAILS_FILE, INGEST_STATE_FILE),
+                                  ProcessedIndex(PROCESSED_IDS_FILE), store)
+    finally:
+        detector.close()
+        store.close()
 
 if __name__ == "__main__":
     success = main()
@@ -0,0 +1,64 @@
+"""
+Processed Email Index
+Append-only log of analyzed email IDs (one JSON value per line) with an in-memory set for O(1) lookups,
+so progress is tracked without rewriting emails_data.json
+"""
+
+import json
+import os
+from pathlib import Path
+
+class ProcessedIndex:
+    """Set of analyzed email IDs, persisted by appending to a log file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.ids = set()
+        self.load()
+
+    def __contains__(self, email_id):
+        return email_id in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load(self):
+        """Read every complete line of the log"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        # A line without its newline was cut off by a crash mid-append (and is followed by
+        # a newline once the next append starts a fresh line): both are skipped
+        lines = [line for line in data.split(b'\n')[:-1] if line]
+        try:
+            # One parse for the whole log; line by line only if it holds a cut-off line
+            self.ids.update(json.loads(b'[' + b','.join(lines) + b']'))
+        except ValueError:
+            for line in lines:
+                try:
+                    self.ids.add(json.loads(line))
+                except ValueError:
+                    continue
+
+    def add(self, email_ids):
+        """Record emails as analyzed (appended and flushed to disk before returning)"""
+        new_ids = [email_id for email_id in dict.fromkeys(email_ids)
+                   if email_id is not None and email_id not in self.ids]
+        if not new_ids:
+            return
+        data = ''.join(json.dumps(email_id, ensure_ascii=False) + '\n' for email_id in new_ids).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            # Start on a fresh line if an earlier append was cut off
+            if f.tell() and not self.ends_with_newline():
+                data = b'\n' + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.ids.update(new_ids)
+
+    def ends_with_newline(self):
+        """True if the log's last byte is a newline"""
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
@@ -0,0 +1,326 @@
+"""
+Phishing Results Store
+SQLite table (WAL mode) of analysis results, upserted by email_id and indexed on threat level,
+received date and sender domain. Pages and aggregates are answered in SQL (store-wide totals are
+kept up to date by triggers), and phishing_results.json is exported from it in the analyze_batch
+schema so existing readers keep working.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+THREAT_LEVELS = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'SAFE']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    email_id      TEXT PRIMARY KEY,
+    is_phishing   INTEGER,
+    threat_level  TEXT,
+    confidence    REAL,
+    sender_domain TEXT,
+    date_received TEXT,
+    analyzed_at   TEXT,
+    failed        INTEGER NOT NULL DEFAULT 0,
+    result        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_threat_level ON results (threat_level, date_received, email_id);
+CREATE INDEX IF NOT EXISTS results_by_date_received ON results (date_received, email_id);
+CREATE INDEX IF NOT EXISTS results_by_sender_domain ON results (sender_domain, date_received, email_id);
+
+-- Counts per threat level ('' for failed results), so totals never scan the results table.
+-- Rows are added with NOT EXISTS: an OR IGNORE here would take the upsert's conflict policy instead
+CREATE TABLE IF NOT EXISTS totals (
+    threat_level TEXT PRIMARY KEY,
+    emails       INTEGER NOT NULL DEFAULT 0,
+    phishing     INTEGER NOT NULL DEFAULT 0,
+    failed       INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS results_count_insert AFTER INSERT ON results BEGIN
+    INSERT INTO totals (threat_level) SELECT COALESCE(NEW.threat_level, '')
+    WHERE NOT EXISTS (SELECT 1 FROM totals WHERE threat_level = COALESCE(NEW.threat_level, ''));
+    UPDATE totals SET emails = emails + 1, phishing = phishing + COALESCE(NEW.is_phishing, 0),
+                      failed = failed + NEW.failed
+    WHERE threat_level = COALESCE(NEW.threat_level, '');
+END;
+CREATE TRIGGER IF NOT EXISTS results_count_delete AFTER DELETE ON results BEGIN
+    UPDATE totals SET emails = emails - 1, phishing = phishing - COALESCE(OLD.is_phishing, 0),
+                      failed = failed - OLD.failed
+    WHERE threat_level = COALESCE(OLD.threat_level, '');
+END;
+CREATE TRIGGER IF NOT EXISTS results_count_update AFTER UPDATE ON results BEGIN
+    UPDATE totals SET emails = emails - 1, phishing = phishing - COALESCE(OLD.is_phishing, 0),
+                      failed = failed - OLD.failed
+    WHERE threat_level = COALESCE(OLD.threat_level, '');
+    INSERT INTO totals (threat_level) SELECT COALESCE(NEW.threat_level, '')
+    WHERE NOT EXISTS (SELECT 1 FROM totals WHERE threat_level = COALESCE(NEW.threat_level, ''));
+    UPDATE totals SET emails = emails + 1, phishing = phishing + COALESCE(NEW.is_phishing, 0),
+                      failed = failed + NEW.failed
+    WHERE threat_level = COALESCE(NEW.threat_level, '');
+END;
+"""
+
+# Fills totals for a database written before the table existed
+COUNT_TOTALS = """
+INSERT INTO totals (threat_level, emails, phishing, failed)
+SELECT COALESCE(threat_level, ''), COUNT(*), COALESCE(SUM(is_phishing), 0), SUM(failed)
+FROM results GROUP BY COALESCE(threat_level, '')
+"""
+
+UPSERT = """
+INSERT INTO results (email_id, is_phishing, threat_level, confidence, sender_domain,
+                     date_received, analyzed_at, failed, result)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (email_id) DO UPDATE SET
+    is_phishing = excluded.is_phishing,
+    threat_level = excluded.threat_level,
+    confidence = excluded.confidence,
+    sender_domain = excluded.sender_domain,
+    date_received = excluded.date_received,
+    analyzed_at = excluded.analyzed_at,
+    failed = excluded.failed,
+    result = excluded.result
+"""
+
+def result_row(result, analyzed_at):
+    """Indexed columns + JSON text of one analyze_email result"""
+    prediction = result.get('prediction') or {}
+    metadata = result.get('analysis_metadata') or {}
+    is_phishing = prediction.get('is_phishing')
+    sender_domain = result.get('sender_domain')
+    return (
+        str(result['email_id']),
+        None if is_phishing is None else int(bool(is_phishing)),
+        prediction.get('threat_level'),
+        prediction.get('confidence'),
+        sender_domain.lower() if isinstance(sender_domain, str) else None,
+        result.get('date_received'),
+        metadata.get('analyzed_at') or analyzed_at,
+        int('error' in result),
+        json.dumps(result, ensure_ascii=False)
+    )
+
+def batch_summary(rows):
+    """batch_summary dict from (threat_level, emails, phishing, failed) count rows"""
+    total = sum(row[1] for row in rows)
+    phishing = sum(row[2] for row in rows)
+    failed = sum(row[3] for row in rows)
+    distribution = dict.fromkeys(THREAT_LEVELS, 0)
+    for level, count, _, _ in rows:
+        if level in distribution:
+            distribution[level] += count
+    successful = total - failed
+    return {
+        'total_emails': total,
+        'analyzed_successfully': successful,
+        'failed': failed,
+        'phishing_detected': phishing,
+        'legitimate': successful - phishing,
+        'phishing_percentage': round((phishing / successful * 100) if successful else 0, 2),
+        'threat_distribution': distribution
+    }
+
+class ResultsStore:
+    """All analysis results ever saved, one row per email_id (the latest analysis wins)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        # WAL: readers (CLI, dashboard) never block the daemon's writes and vice versa;
+        # NORMAL sync is crash-safe in WAL mode and skips an fsync per transaction
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            if self.conn.execute('SELECT 1 FROM totals LIMIT 1').fetchone() is None:
+                self.conn.execute(COUNT_TOTALS)
+
+    def __len__(self):
+        return self.conn.execute('SELECT COALESCE(SUM(emails), 0) FROM totals').fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    # ==================== WRITING ====================
+
+    def upsert(self, results):
+        """Insert or replace results by email_id in one transaction; returns the number written"""
+        analyzed_at = datetime.now().isoformat()
+        rows = [result_row(result, analyzed_at) for result in results
+                if result.get('email_id') is not None]
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def import_json(self, path):
+        """Load results from an analyze_batch JSON file (e.g. phishing_results.json written before the store)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        results = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(results, list):
+            return 0
+        return self.upsert(result for result in results if isinstance(result, dict))
+
+    # ==================== QUERIES ====================
+
+    def where(self, threat_level=None, sender_domain=None, is_phishing=None, since=None, until=None):
+        """SQL condition + parameters for the query filters (dates compare as 'YYYY-MM-DD HH:MM:SS' text)"""
+        conditions, params = [], []
+        if threat_level is not None:
+            conditions.append('threat_level = ?')
+            params.append(threat_level.upper())
+        if sender_domain is not None:
+            conditions.append('sender_domain = ?')
+            params.append(sender_domain.lower())
+        if is_phishing is not None:
+            conditions.append('is_phishing = ?')
+            params.append(int(bool(is_phishing)))
+        if since is not None:
+            conditions.append('date_received >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('date_received < ?')
+            params.append(until)
+        return (' WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    def query(self, page=1, page_size=50, **filters):
+        """One page of results, newest received first, with the total count of matching results"""
+        if page < 1 or page_size < 1:
+            raise ValueError(f"page and page_size must be at least 1, got {page} and {page_size}")
+        where, params = self.where(**filters)
+        total = self.conn.execute(f'SELECT COUNT(*) FROM results{where}', params).fetchone()[0]
+        rows = self.conn.execute(
+            f'SELECT result FROM results{where} ORDER BY date_received DESC, email_id DESC LIMIT ? OFFSET ?',
+            params + [page_size, (page - 1) * page_size]
+        ).fetchall()
+        return {
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'pages': (total + page_size - 1) // page_size,
+            'results': [json.loads(row[0]) for row in rows]
+        }
+
+    def get(self, email_id):
+        """Stored result of one email, or None"""
+        row = self.conn.execute('SELECT result FROM results WHERE email_id = ?', (str(email_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def summary(self, **filters):
+        """Aggregates over the stored results in the batch_summary schema of analyze_batch"""
+        if any(value is not None for value in filters.values()):
+            where, params = self.where(**filters)
+            rows = self.conn.execute(
+                f'SELECT threat_level, COUNT(*), COALESCE(SUM(is_phishing), 0), SUM(failed) '
+                f'FROM results{where} GROUP BY threat_level', params).fetchall()
+        else:
+            rows = self.conn.execute('SELECT threat_level, emails, phishing, failed FROM totals').fetchall()
+        return batch_summary(rows)
+
+    def top_sender_domains(self, limit=10, **filters):
+        """(sender_domain, count) pairs with the most matching results"""
+        where, params = self.where(**filters)
+        where += (' AND' if where else ' WHERE') + ' sender_domain IS NOT NULL'
+        return self.conn.execute(
+            f'SELECT sender_domain, COUNT(*) AS n FROM results{where} '
+            f'GROUP BY sender_domain ORDER BY n DESC, sender_domain LIMIT ?',
+            params + [limit]
+        ).fetchall()
+
+    # ==================== EXPORT ====================
+
+    def export_json(self, path, limit=None):
+        """
+        Write results to a JSON file in the analyze_batch schema (batch_summary, results, analyzed_at):
+        all of them in analysis order, or only the `limit` most recently received, with a batch_summary
+        over those rows. Stored JSON text is copied as is (the store-wide summary comes from the
+        trigger-kept totals), and the file is replaced atomically so readers never see it half-written.
+        """
+        path = Path(path)
+        if limit is None:
+            summary = self.summary()
+            rows = self.conn.execute('SELECT analyzed_at, result FROM results ORDER BY rowid')
+        else:
+            page = self.conn.execute(
+                'SELECT threat_level, is_phishing, failed, analyzed_at, result FROM results '
+                'ORDER BY date_received DESC, email_id DESC LIMIT ?', (limit,)).fetchall()
+            summary = batch_summary([(level, 1, is_phishing or 0, failed)
+                                     for level, is_phishing, failed, _, _ in page])
+            rows = [(analyzed_at, text) for _, _, _, analyzed_at, text in reversed(page)]
+        tmp_path = path.with_name(path.name + '.tmp')
+        latest = ''
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"batch_summary": ' + json.dumps(summary, ensure_ascii=False))
+            f.write(', "results": [')
+            separator = '\n'
+            for analyzed_at, text in rows:
+                f.write(separator + text)
+                separator = ',\n'
+                latest = max(latest, analyzed_at or '')
+            f.write('\n], "analyzed_at": ' + json.dumps(latest or datetime.now().isoformat()) + '}\n')
+        os.replace(tmp_path, path)
+        return path
+
+def main():
+    import argparse
+    from process_emails import RESULTS_DB, RESULTS_FILE
+
+    parser = argparse.ArgumentParser(description='Query the phishing results store')
+    parser.add_argument('--db', default=str(RESULTS_DB), help=f'Results database (default: {RESULTS_DB.name})')
+    parser.add_argument('--page', type=int, default=1, help='Page to list (default: 1)')
+    parser.add_argument('--page-size', type=int, default=20, help='Results per page (default: 20)')
+    parser.add_argument('--threat-level', choices=THREAT_LEVELS, help='Only this threat level')
+    parser.add_argument('--domain', help='Only this sender domain')
+    parser.add_argument('--phishing-only', action='store_true', help='Only emails classified as phishing')
+    parser.add_argument('--since', help="Received at or after this date ('YYYY-MM-DD[ HH:MM:SS]')")
+    parser.add_argument('--until', help='Received before this date')
+    parser.add_argument('--stats', action='store_true', help='Print aggregates instead of a page')
+    parser.add_argument('--export', nargs='?', const=str(RESULTS_FILE), metavar='PATH',
+                        help=f'Export results as JSON (default: {RESULTS_FILE.name})')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Export only the N most recently received results (default: all)')
+    parser.add_argument('--import-json', metavar='PATH', help='Load results from an analyze_batch JSON file')
+
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    filters = {'threat_level': args.threat_level, 'sender_domain': args.domain,
+               'is_phishing': True if args.phishing_only else None, 'since': args.since, 'until': args.until}
+    try:
+        if args.import_json:
+            print(f"Imported {store.import_json(args.import_json)} results from {args.import_json}")
+        if args.export:
+            exported = len(store) if args.limit is None else min(args.limit, len(store))
+            print(f"Exported {exported} results to {store.export_json(args.export, args.limit)}")
+        if args.stats:
+            summary = store.summary(**filters)
+            print("="*80)
+            print("RESULTS STORE STATISTICS")
+            print("="*80)
+            print(f"  Total emails:      {summary['total_emails']}")
+            print(f"  Phishing detected: {summary['phishing_detected']}")
+            print(f"  Legitimate:        {summary['legitimate']}")
+            print(f"  Failed:            {summary['failed']}")
+            print(f"  Phishing rate:     {summary['phishing_percentage']}%")
+            print(f"\n  Threat Distribution:")
+            for level, count in summary['threat_distribution'].items():
+                print(f"    {level}: {count}")
+            print(f"\n  Top Sender Domains:")
+            for domain, count in store.top_sender_domains(**filters):
+                print(f"    {domain}: {count}")
+            print("="*80)
+        elif not (args.import_json or args.export):
+            page = store.query(page=args.page, page_size=args.page_size, **filters)
+            print(f"Page {page['page']} of {page['pages']} ({page['total']} matching results)\n")
+            for result in page['results']:
+                prediction = result.get('prediction') or {}
+                print(f"  {result.get('date_received') or '-':19}  {prediction.get('threat_level') or 'ERROR':8}  "
+                      f"{result.get('sender_domain') or '-':30}  {result.get('subject') or ''}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
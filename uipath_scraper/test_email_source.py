@@ -0,0 +1,184 @@
+"""
+Behaviour checks for incremental ingestion of emails_data.json (email_source.py)
+Run: python -m pytest test_email_source.py -q
+"""
+
+import json
+
+import pytest
+
+from email_source import EmailSource
+
+EMAILS = [{'email_id': f'e{i}', 'subject': 'Ünïcødé "q" \\ ] } ' * (i % 3), 'body_full': 'x' * (i * 37 % 900),
+           'n': [1, {'a': ']'}]} for i in range(120)]
+
+CHUNK_SIZES = [7, 100, 1 << 20]
+
+
+def write_array(path, emails, indent=2, bom=False, junk=None, junk_at=50):
+    """Write emails as a JSON array, optionally with an invalid element inserted at junk_at"""
+    parts = [json.dumps(email, indent=indent, ensure_ascii=False) for email in emails]
+    if junk is not None:
+        parts.insert(junk_at, junk)
+    data = ('[\n' + ',\n'.join(parts) + '\n]').encode('utf-8')
+    path.write_bytes((b'\xef\xbb\xbf' if bom else b'') + data)
+    return data
+
+
+def write_jsonl(path, emails, mode='wb'):
+    with open(path, mode) as f:
+        for email in emails:
+            f.write(json.dumps(email, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / 'emails_data.json', tmp_path / 'state.json'
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('indent', [2, None])
+@pytest.mark.parametrize('bom', [False, True])
+def test_array_reads_only_appended_emails(paths, chunk_size, indent, bom):
+    path, state = paths
+    write_array(path, EMAILS[:100], indent, bom)
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    assert source.read_new() == EMAILS[:100] and source.format == 'array'
+    source.commit()
+
+    # A fresh instance resumes from the saved state
+    write_array(path, EMAILS[:110], indent, bom)
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    assert source.read_new() == EMAILS[100:110] and not source.restarted
+    source.commit()
+    assert source.read_new() == []
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_truncated_last_element_waits_for_the_rest(paths, chunk_size):
+    path, state = paths
+    write_array(path, EMAILS[:100])
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    source.read_new()
+    source.commit()
+
+    # Cut inside the nested brackets of the last element, as if UiPath were still writing it
+    data = write_array(path, EMAILS[:111])
+    path.write_bytes(data[:data.rindex(b'"n"') + 12])
+    got = source.read_new()
+    assert got == EMAILS[100:110] and source.skipped == 0
+    source.commit()
+
+    path.write_bytes(data)
+    assert source.read_new() == EMAILS[110:111]
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('junk', ['}', '1 2', '{"email_id": "bad", "x": tru}', '{"a": 1,}', "{'single': 1}",
+                                  'NaNx', '{"a": "\\q"}', ''])
+def test_invalid_array_element_is_skipped_once(paths, chunk_size, junk):
+    path, state = paths
+    write_array(path, EMAILS[:100], junk=junk)
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    assert [email for email in source.read_new() if 'email_id' in email] == EMAILS[:100]
+    assert source.skipped == 1
+    source.commit()
+
+    # Later runs continue past it instead of stopping there again
+    write_array(path, EMAILS[:110], junk=junk)
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    assert source.read_new() == EMAILS[100:110]
+    assert source.skipped == 0 and not source.restarted
+
+
+@pytest.mark.parametrize('chunk_size', [5, 1 << 20])
+def test_jsonl_skips_invalid_lines_and_waits_for_a_cut_off_one(paths, chunk_size):
+    path, state = paths
+    write_jsonl(path, EMAILS[:50])
+    with open(path, 'ab') as f:
+        f.write(b'{"email_id": "bad", \n')
+    write_jsonl(path, EMAILS[50:52], 'ab')
+    with open(path, 'ab') as f:
+        f.write(json.dumps(EMAILS[52]).encode('utf-8')[:-5])
+
+    source = EmailSource(path, state, chunk_size=chunk_size)
+    assert source.read_new() == EMAILS[:52] and source.format == 'jsonl' and source.skipped == 1
+    source.commit()
+
+    with open(path, 'ab') as f:
+        f.write(json.dumps(EMAILS[52]).encode('utf-8')[-5:] + b'\n')
+    assert EmailSource(path, state, chunk_size=chunk_size).read_new() == EMAILS[52:53]
+
+
+def test_rewritten_file_is_read_from_the_start(paths):
+    path, state = paths
+    write_array(path, EMAILS[:100], indent=2)
+    source = EmailSource(path, state)
+    source.read_new()
+    source.commit()
+
+    # Reformatted (same emails, other layout): the saved offset no longer matches
+    write_array(path, EMAILS[:100], indent=4)
+    assert source.read_new() == EMAILS[:100] and source.restarted
+    source.commit()
+
+    # Truncated below the saved offset
+    write_array(path, EMAILS[:10], indent=4)
+    assert source.read_new() == EMAILS[:10] and source.restarted
+
+
+def test_unreadable_state_starts_over(paths):
+    path, state = paths
+    write_array(path, EMAILS[:5])
+    state.write_text('{"cut off', encoding='utf-8')
+    assert EmailSource(path, state).read_new() == EMAILS[:5]
+
+
+def test_uncommitted_read_is_returned_again(paths):
+    path, state = paths
+    write_array(path, EMAILS[:5])
+    source = EmailSource(path, state)
+    source.read_new()
+    assert source.read_new() == EMAILS[:5]
+    assert EmailSource(path, state).read_new() == EMAILS[:5]
+
+
+def test_requeued_emails_come_back_before_the_new_ones(paths):
+    path, state = paths
+    write_array(path, EMAILS[:5])
+    source = EmailSource(path, state)
+    source.read_new()
+    source.requeue([EMAILS[1], EMAILS[3]])
+    source.commit()
+
+    write_array(path, EMAILS[:7])
+    source = EmailSource(path, state)
+    assert source.read_new() == [EMAILS[1], EMAILS[3]] + EMAILS[5:7] and source.retried == 2
+    # Committed without requeuing: nothing is retried any more
+    source.commit()
+    assert source.read_new() == [] and source.retried == 0
+
+
+def test_requeued_email_is_replaced_by_a_newer_copy(paths):
+    path, state = paths
+    write_array(path, EMAILS[:5])
+    source = EmailSource(path, state)
+    source.read_new()
+    source.requeue([EMAILS[1], EMAILS[3]])
+    source.commit()
+
+    newer = {**EMAILS[3], 'subject': 'fixed'}
+    write_array(path, EMAILS[:5] + [newer])
+    assert source.read_new() == [EMAILS[1], newer]
+
+
+def test_requeued_emails_are_dropped_when_the_file_is_rewritten(paths):
+    path, state = paths
+    write_array(path, EMAILS[:5])
+    source = EmailSource(path, state)
+    source.read_new()
+    source.requeue([EMAILS[1]])
+    source.commit()
+
+    write_array(path, EMAILS[:5], indent=4)
+    assert source.read_new() == EMAILS[:5] and source.restarted and source.retried == 0
@@ -0,0 +1,77 @@
+"""
+Behaviour checks for the processed-ID index (processed_index.py) and how process_emails.py fills it
+Run: python -m pytest test_processed_index.py -q
+"""
+
+import json
+
+import process_emails
+from email_source import EmailSource
+from processed_index import ProcessedIndex
+from results_store import ResultsStore
+
+
+def test_ids_survive_a_reload(tmp_path):
+    index = ProcessedIndex(tmp_path / 'ids.log')
+    index.add(['a', 'b', 'a', None, 7])
+    index.add(['b', 'c'])
+    assert ProcessedIndex(tmp_path / 'ids.log').ids == {'a', 'b', 'c', 7}
+    assert (tmp_path / 'ids.log').read_text(encoding='utf-8').splitlines() == ['"a"', '"b"', '7', '"c"']
+
+
+def test_line_cut_off_by_a_crash_is_ignored(tmp_path):
+    path = tmp_path / 'ids.log'
+    path.write_bytes(b'"a"\n"b"\n"cut')
+    index = ProcessedIndex(path)
+    assert index.ids == {'a', 'b'}
+    index.add(['d'])
+    assert ProcessedIndex(path).ids == {'a', 'b', 'd'}
+
+
+class FailingDetector:
+    """Stand-in for PhishingDetector whose analysis fails for the email IDs in `failing`"""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.analyzed = []
+
+    def analyze_batch(self, emails):
+        self.analyzed.append([email['email_id'] for email in emails])
+        results = [{'email_id': email['email_id'], 'error': 'boom'} if email['email_id'] in self.failing else
+                   {'email_id': email['email_id'], 'prediction': {'is_phishing': False, 'threat_level': 'SAFE'}}
+                   for email in emails]
+        failed = sum(1 for result in results if 'error' in result)
+        return {'results': results, 'batch_summary': {'phishing_detected': 0, 'legitimate': len(emails) - failed}}
+
+    def save_url_cache(self):
+        pass
+
+
+def test_failed_emails_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    emails_file = tmp_path / 'emails_data.json'
+    monkeypatch.setattr(process_emails, 'EMAILS_FILE', emails_file)
+    monkeypatch.setattr(process_emails, 'RESULTS_FILE', tmp_path / 'phishing_results.json')
+    emails = [{'email_id': f'e{i}', 'subject': 's', 'body_full': 'b'} for i in range(4)]
+    emails_file.write_text(json.dumps(emails[:3]), encoding='utf-8')
+
+    index = ProcessedIndex(tmp_path / 'ids.log')
+    store = ResultsStore(tmp_path / 'results.db')
+    detector = FailingDetector(failing={'e1'})
+    source = EmailSource(emails_file, tmp_path / 'state.json')
+    assert process_emails.process_new_emails(detector, source, index, store)
+    assert index.ids == {'e0', 'e2'}
+    assert store.summary()['failed'] == 1
+
+    # Next run (a fresh source reads the saved state): e1 again, then the email added since
+    emails_file.write_text(json.dumps(emails), encoding='utf-8')
+    detector.failing.clear()
+    source = EmailSource(emails_file, tmp_path / 'state.json')
+    assert process_emails.process_new_emails(detector, source, index, store)
+    assert detector.analyzed[-1] == ['e1', 'e3']
+    assert index.ids == {'e0', 'e1', 'e2', 'e3'}
+    assert store.summary()['failed'] == 0 and len(store) == 4
+
+    # Nothing left to retry
+    assert process_emails.process_new_emails(detector, source, index, store)
+    assert len(detector.analyzed) == 2
+    store.close()
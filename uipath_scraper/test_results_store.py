@@ -0,0 +1,114 @@
+"""
+Behaviour checks for the phishing results store (results_store.py)
+Run: python -m pytest test_results_store.py -q
+"""
+
+import json
+
+import pytest
+
+from results_store import ResultsStore, batch_summary
+
+
+def result(email_id, threat_level='SAFE', date_received='2025-11-07 10:00:00', sender_domain='example.com'):
+    """An analyze_email result (is_phishing follows the threat level)"""
+    return {
+        'email_id': email_id,
+        'sender_domain': sender_domain,
+        'date_received': date_received,
+        'prediction': {'is_phishing': threat_level in ('CRITICAL', 'HIGH', 'MEDIUM'),
+                       'threat_level': threat_level, 'confidence': 0.9}
+    }
+
+
+def failed(email_id, date_received='2025-11-07 10:00:00'):
+    """A FAILED entry of analyze_batch"""
+    return {'email_id': email_id, 'date_received': date_received, 'error': 'boom'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / 'results.db')
+    yield store
+    store.close()
+
+
+def counted(store):
+    """batch_summary counted from the results table itself"""
+    rows = store.conn.execute("SELECT COALESCE(threat_level, ''), COUNT(*), COALESCE(SUM(is_phishing), 0), "
+                              "SUM(failed) FROM results GROUP BY 1").fetchall()
+    return batch_summary(rows)
+
+
+def test_upsert_replaces_by_email_id(store):
+    store.upsert([result('a', 'HIGH'), result('b')])
+    store.upsert([result('a', 'LOW')])
+    assert len(store) == 2
+    assert store.get('a')['prediction']['threat_level'] == 'LOW'
+
+
+def test_totals_follow_upserts_to_and_from_failed(store):
+    store.upsert([result('a', 'HIGH'), result('b', 'CRITICAL'), result('c')])
+    store.upsert([failed('a'), failed('d')])
+    summary = store.summary()
+    assert summary == counted(store)
+    assert summary['total_emails'] == 4 and summary['failed'] == 2 and summary['phishing_detected'] == 1
+    assert summary['threat_distribution']['HIGH'] == 0
+
+    store.upsert([result('a', 'MEDIUM'), result('d', 'MEDIUM')])
+    assert store.summary() == counted(store)
+    assert store.summary()['failed'] == 0 and store.summary()['phishing_detected'] == 3
+
+
+def test_totals_follow_deletes(store):
+    store.upsert([result('a', 'HIGH'), failed('b')])
+    with store.conn:
+        store.conn.execute("DELETE FROM results WHERE email_id IN ('a', 'b')")
+    assert len(store) == 0
+    assert store.summary() == counted(store)
+
+
+def test_totals_are_counted_for_a_database_without_them(tmp_path):
+    store = ResultsStore(tmp_path / 'results.db')
+    store.upsert([result('a', 'HIGH'), failed('b'), result('c')])
+    store.conn.executescript('DROP TRIGGER results_count_insert; DROP TRIGGER results_count_delete; '
+                             'DROP TRIGGER results_count_update; DROP TABLE totals;')
+    store.close()
+    store = ResultsStore(tmp_path / 'results.db')
+    assert store.summary() == counted(store) and len(store) == 3
+    store.close()
+
+
+def test_filtered_summary_and_pages(store):
+    store.upsert([result(f'e{i}', 'HIGH' if i % 2 else 'SAFE', f'2025-11-{i + 1:02d} 10:00:00')
+                  for i in range(9)])
+    assert store.summary(threat_level='high')['total_emails'] == 4
+    page = store.query(page=1, page_size=3, threat_level='SAFE')
+    assert page['total'] == 5
+    assert [r['email_id'] for r in page['results']] == ['e8', 'e6', 'e4']
+
+
+def test_export_holds_every_result_by_default(store, tmp_path):
+    store.upsert([result(f'e{i}', 'HIGH', f'2025-11-{i + 1:02d} 10:00:00') for i in range(5)] + [failed('x')])
+    path = store.export_json(tmp_path / 'out.json')
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert [r['email_id'] for r in data['results']] == ['e0', 'e1', 'e2', 'e3', 'e4', 'x']
+    assert data['batch_summary'] == store.summary()
+    assert not path.with_name(path.name + '.tmp').exists()
+
+
+def test_limited_export_summarizes_the_exported_rows(store, tmp_path):
+    store.upsert([result(f'e{i}', 'HIGH' if i < 3 else 'SAFE', f'2025-11-{i + 1:02d} 10:00:00')
+                  for i in range(6)])
+    data = json.loads(store.export_json(tmp_path / 'out.json', limit=2).read_text(encoding='utf-8'))
+    assert [r['email_id'] for r in data['results']] == ['e4', 'e5']
+    assert data['batch_summary']['total_emails'] == 2
+    assert data['batch_summary']['phishing_detected'] == 0
+
+
+def test_import_json_reads_an_earlier_export(store, tmp_path):
+    path = tmp_path / 'phishing_results.json'
+    path.write_text(json.dumps({'results': [result('a', 'HIGH'), failed('b'), 'junk', {'no': 'id'}]}),
+                    encoding='utf-8')
+    assert store.import_json(path) == 2
+    assert store.summary()['failed'] == 1